@@ -0,0 +1,721 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from movie_data import build_ratings_view
+from movie_models import FeatureStore, IncrementalRandomForestRegressor, ModelRegistry, explain_features
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+HISTORY_CSV = "live_ratings_history.csv"
+HISTORY_DIR = os.environ.get("MOVIE_QUIZ_HISTORY_DIR", "live_ratings_history")
+
+HISTORY_SCHEMA = pa.schema([
+    ("movie_id", pa.dictionary(pa.int32(), pa.string())),
+    ("title", pa.dictionary(pa.int32(), pa.string())),
+    ("static_rating", pa.float32()),
+    ("live_rating", pa.float32()),
+    ("checked_at", pa.int64()),  # seconds since the epoch (local clock, as CheckedAt was written)
+])
+PARTITION_SCHEMA = pa.schema([("date", pa.string())])  # date=YYYY-MM-DD directories
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+# Stored column → column name used by scenario 14 and the old CSV
+COLUMN_NAMES = {
+    "movie_id": "Movie ID",
+    "title": "Title",
+    "static_rating": "IMDb Rating (Static)",
+    "live_rating": "IMDb Rating (Live)",
+    "checked_at": "CheckedAt",
+}
+
+
+def to_epoch_seconds(timestamps):
+    return pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+# --- Append-only rating snapshots, one Parquet file per append, partitioned by date ---
+class HistoryStore:
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self.lock = threading.RLock()
+
+    @contextmanager
+    def locked(self):
+        """Serializes read-modify-write of the files under root across threads and processes
+        (the UI's collector, scheduled `collect --every` runs and sweeps); never nest two of these."""
+        with self.lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, ".lock"), "w") as fh:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _dataset(self):
+        files = glob.glob(os.path.join(self.root, "date=*", "*.parquet"))
+        if not files:
+            return None
+        return ds.dataset(files, schema=pa.unify_schemas([HISTORY_SCHEMA, PARTITION_SCHEMA]), format="parquet",
+                          partitioning=PARTITIONING, partition_base_dir=self.root)
+
+    def append(self, df):
+        """Append rows with the scenario 14 columns (Movie ID, Title, ratings, CheckedAt)."""
+        if df.empty:
+            return 0
+        # Sorted by Movie ID so each file's row-group statistics narrow ID lookups
+        df = df.sort_values(["Movie ID", "CheckedAt"], kind="stable")
+        checked_at = to_epoch_seconds(df["CheckedAt"])
+        table = pa.table({
+            "movie_id": pa.array(df["Movie ID"].to_numpy(dtype=object), pa.string()).dictionary_encode(),
+            "title": pa.array(df["Title"].astype(str).to_numpy(dtype=object), pa.string()).dictionary_encode(),
+            "static_rating": pa.array(pd.to_numeric(df["IMDb Rating (Static)"], errors="coerce"), pa.float32()),
+            "live_rating": pa.array(pd.to_numeric(df["IMDb Rating (Live)"], errors="coerce"), pa.float32()),
+            "checked_at": pa.array(checked_at, pa.int64()),
+        }).cast(HISTORY_SCHEMA)
+        dates = checked_at.astype("datetime64[s]").astype("datetime64[D]").astype(str)
+
+        with self.lock:
+            for date in np.unique(dates):
+                part = table.filter(pa.array(dates == date))
+                directory = os.path.join(self.root, f"date={date}")
+                os.makedirs(directory, exist_ok=True)
+                # New files only: written under a temporary name, then renamed into place
+                name = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+                tmp = os.path.join(directory, f".{name}.tmp")
+                pq.write_table(part, tmp)
+                os.replace(tmp, os.path.join(directory, name))
+        return table.num_rows
+
+    def scan(self, movie_ids=None, start=None, end=None, columns=None):
+        """Rows for movie_ids between start and end (inclusive), reading only the matching date partitions."""
+        expr = ds.scalar(True)
+        if start is not None:
+            start = pd.Timestamp(start)
+            expr &= (ds.field("date") >= start.strftime("%Y-%m-%d")) & (ds.field("checked_at") >= int(start.timestamp()))
+        if end is not None:
+            end = pd.Timestamp(end)
+            expr &= (ds.field("date") <= end.strftime("%Y-%m-%d")) & (ds.field("checked_at") <= int(end.timestamp()))
+        if movie_ids is not None:
+            expr &= ds.field("movie_id").isin(pa.array(list(movie_ids), pa.string()))
+        for attempt in range(3):
+            try:
+                dataset = self._dataset()
+                if dataset is None:
+                    return self._frame(HISTORY_SCHEMA.empty_table())
+                return self._frame(dataset.to_table(columns=columns or list(COLUMN_NAMES), filter=expr))
+            except FileNotFoundError:
+                # A collector compacted the day between listing and reading its files
+                if attempt == 2:
+                    raise
+
+    def drift(self, movie_id, days=90, now=None):
+        """Live-rating history of one film over the last `days` days, oldest first."""
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        return self.scan([movie_id], start=now - pd.Timedelta(days=days), end=now).sort_values("CheckedAt")
+
+    @staticmethod
+    def _frame(table):
+        df = table.to_pandas()
+        for col in ("movie_id", "title"):
+            if col in df:
+                df[col] = df[col].astype(object)
+        if "checked_at" in df:
+            df["checked_at"] = pd.to_datetime(df["checked_at"], unit="s")
+        if {"static_rating", "live_rating"} <= set(df.columns):
+            df["Rating Difference"] = df["live_rating"] - df["static_rating"]
+        return df.rename(columns=COLUMN_NAMES).reset_index(drop=True)
+
+    def compact(self, before=None):
+        """Merge each past day's append files into one (today's partition is left alone).
+
+        Run by the collector after every pass, so a day ends up as a single file. Files are listed
+        only once the lock is held, so a concurrent compaction's output is never merged twice.
+        """
+        before = (pd.Timestamp(before) if before is not None else pd.Timestamp.now()).strftime("%Y-%m-%d")
+        with self.locked():
+            for directory in glob.glob(os.path.join(self.root, "date=*")):
+                files = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+                if len(files) < 2 or os.path.basename(directory)[len("date="):] >= before:
+                    continue
+                table = pa.concat_tables([pq.read_table(f, schema=HISTORY_SCHEMA) for f in files])
+                order = pc.sort_indices(
+                    pa.table({"movie_id": table["movie_id"].cast(pa.string()), "checked_at": table["checked_at"]}),
+                    sort_keys=[("movie_id", "ascending"), ("checked_at", "ascending")],
+                )
+                name = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}-compacted.parquet"
+                tmp = os.path.join(directory, f".{name}.tmp")
+                pq.write_table(table.take(order), tmp)
+                os.replace(tmp, os.path.join(directory, name))
+                for f in files:
+                    os.remove(f)
+
+    # --- Last fetch attempt per Movie ID, whether or not it produced a reading ---
+    def _attempts_path(self):
+        return os.path.join(self.root, "attempts.parquet")
+
+    def last_attempted(self):
+        try:
+            return pd.read_parquet(self._attempts_path())["last_attempted"]
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return pd.Series(dtype="datetime64[ns]", index=pd.Index([], name="Movie ID"), name="last_attempted")
+
+    def record_attempts(self, movie_ids, timestamp):
+        with self.locked():
+            attempts = self.last_attempted()
+            ids = pd.Index(pd.unique(pd.Series(movie_ids)), name="Movie ID")
+            attempts = pd.concat([
+                attempts.drop(ids, errors="ignore"),
+                pd.Series(pd.Timestamp(timestamp), index=ids, name="last_attempted"),
+            ])
+            attempts.to_frame().to_parquet(self._attempts_path() + ".tmp")
+            os.replace(self._attempts_path() + ".tmp", self._attempts_path())
+
+    # --- One-time import of the old CSV history ---
+    def _import_marker(self):
+        return os.path.join(self.root, "imported.json")
+
+    def import_csv(self, path, catalog):
+        """Import a live_ratings_history.csv once (by content hash); Movie IDs are looked up by Title."""
+        with open(path, "rb") as fh:
+            digest = hashlib.sha256(fh.read()).hexdigest()
+        # Locked, so the page load and a starting collector cannot both import the same file
+        with self.locked():
+            try:
+                with open(self._import_marker()) as fh:
+                    imported = json.load(fh)
+            except (FileNotFoundError, ValueError):
+                imported = []
+            if digest in imported:
+                return 0
+
+            history = pd.read_csv(path)
+            history["_row"] = np.arange(len(history))
+            # A title can belong to several films: prefer the one whose catalog rating is the stored static rating
+            candidates = history.merge(
+                catalog[["Title", "Movie ID", "IMDb Rating"]].astype({"Title": str}), on="Title", how="left"
+            )
+            candidates["_exact"] = candidates["IMDb Rating"] == candidates["IMDb Rating (Static)"]
+            matched = (candidates.sort_values(["_row", "_exact"], ascending=[True, False])
+                       .drop_duplicates("_row").sort_values("_row"))
+            # Titles no longer in the catalog have no Movie ID; rows without a live rating are
+            # dropped too, as collect() never stores those
+            unmatched = matched["Movie ID"].isna()
+            if unmatched.any():
+                logger.warning("Skipped %d history rows whose title is not in the catalog: %s", unmatched.sum(),
+                               ", ".join(matched.loc[unmatched, "Title"].astype(str).unique()[:10]))
+            matched = matched[~unmatched & pd.to_numeric(matched["IMDb Rating (Live)"], errors="coerce").notna()]
+            added = self.append(matched)
+
+            with open(self._import_marker(), "w") as fh:
+                json.dump(imported + [digest], fh)
+            return added
+
+
+# --- Drift monitoring: EWMA, z-score and two-sided CUSUM per film, folded forward over new rows only ---
+EWMA_ALPHA = 0.3
+Z_THRESHOLD = 3.0
+CUSUM_SLACK = 0.05  # per-reading drift below this (rating points) never accumulates
+CUSUM_THRESHOLD = 0.3
+REFRESH_OVERLAP = pd.Timedelta(days=1)
+STAT_DECIMALS = 6
+
+STATE_COLUMNS = ["Title", "n", "sum", "sumsq", "ewma", "cusum_up", "cusum_down", "last_diff", "last_checked"]
+ALERT_COLUMNS = ["Movie ID", "Title", "CheckedAt", "Alert", "Rating Difference", "EWMA", "Statistic"]
+
+
+class DriftMonitor:
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        self.state_path = os.path.join(store.root, "monitor_state.parquet")
+        self.alerts_path = os.path.join(store.root, "monitor_alerts.parquet")
+        self._mtime = None
+        self.load()
+
+    @staticmethod
+    def _read(path, default):
+        try:
+            return pd.read_parquet(path)
+        except (FileNotFoundError, OSError, ValueError):
+            return default
+
+    def load(self):
+        """Re-read state and alerts if another process (the collector) has written newer ones."""
+        try:
+            mtime = os.path.getmtime(self.state_path)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime == self._mtime:
+            return self
+        self.state = self._read(self.state_path, pd.DataFrame(columns=STATE_COLUMNS, index=pd.Index([], name="Movie ID")))
+        self.alerts = self._read(self.alerts_path, pd.DataFrame(columns=ALERT_COLUMNS))
+        self._mtime = mtime
+        return self
+
+    def refresh(self):
+        """Fold history rows newer than the last processed reading into the state; returns the new alerts."""
+        with self.lock, self.store.locked():
+            self.load()
+            watermark = self.state["last_checked"].max() if len(self.state) else None
+            # Re-read a short overlap and keep readings newer than each film's own last one, so a
+            # batch stored late (or in the same second as the watermark) is still picked up
+            new = self.store.scan(start=None if watermark is None else watermark - REFRESH_OVERLAP)
+            last = pd.to_datetime(self.state["last_checked"].reindex(new["Movie ID"]).to_numpy())
+            new = new[~(new["CheckedAt"].to_numpy() <= last)]
+            new = new.dropna(subset=["Rating Difference"])
+            if new.empty:
+                return self.alerts.iloc[:0]
+
+            state, alerts = self.update(self.state, new)
+            self.state = pd.concat([self.state.drop(state.index, errors="ignore"), state]) if len(self.state) else state
+            self.alerts = pd.concat([self.alerts, alerts], ignore_index=True) if len(self.alerts) else alerts
+            os.makedirs(self.store.root, exist_ok=True)
+            for frame, path in ((self.alerts, self.alerts_path), (self.state, self.state_path)):
+                frame.to_parquet(path + ".tmp")
+                os.replace(path + ".tmp", path)
+            self._mtime = os.path.getmtime(self.state_path)
+            return alerts
+
+    @staticmethod
+    def update(state, new):
+        """Vectorized over every film at once: (updated state rows, alerts raised by the new readings)."""
+        df = new.sort_values(["Movie ID", "CheckedAt"], kind="stable").reset_index(drop=True)
+        ids = df["Movie ID"]
+        # Ratings have one decimal; dropping the float32 storage noise keeps the sums exact enough
+        x = np.round(df["Rating Difference"].to_numpy(dtype=np.float64), STAT_DECIMALS)
+        by = pd.Series(x).groupby(ids.to_numpy(), sort=False)
+        first = ~ids.duplicated().to_numpy()
+        last = ~ids.duplicated(keep="last").to_numpy()
+
+        prev = state.reindex(ids)
+        seen = prev["n"].notna().to_numpy()
+        n0, sum0, sq0, ewma0, up0, down0 = (
+            prev[c].fillna(0).to_numpy(dtype=np.float64) for c in ["n", "sum", "sumsq", "ewma", "cusum_up", "cusum_down"]
+        )
+
+        # Running moments from cumulative sums; z-score of each reading against the ones before it
+        n = n0 + by.cumcount().to_numpy() + 1
+        total = sum0 + by.cumsum().to_numpy()
+        total_sq = sq0 + pd.Series(x * x).groupby(ids.to_numpy(), sort=False).cumsum().to_numpy()
+        n_before = n - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_before = (total - x) / n_before
+            var_before = (total_sq - x * x - n_before * mean_before ** 2) / (n_before - 1)
+            z = np.where((n_before >= 2) & (var_before > 1e-12), (x - mean_before) / np.sqrt(var_before), np.nan)
+        z = np.round(z, STAT_DECIMALS)
+
+        # EWMA (adjust=False) in one grouped pass; a film's stored EWMA is prepended as its first value
+        seeds = pd.DataFrame({"id": ids[first & seen].to_numpy(), "x": ewma0[first & seen]},
+                             index=np.arange(len(df), len(df) + (first & seen).sum()))
+        seeded = pd.concat([seeds, pd.DataFrame({"id": ids.to_numpy(), "x": x})])
+        ewma = (seeded.groupby("id", sort=False)["x"].ewm(alpha=EWMA_ALPHA, adjust=False).mean()
+                .droplevel(0).sort_index().to_numpy()[:len(df)])
+
+        # Tabular CUSUM without the per-step max(0, ·) recursion:
+        # with C_t = S_0 + cumsum(d), S_t = C_t - min(0, min_{j<=t} C_j)
+        def cusum(d, s0):
+            c = s0 + pd.Series(d).groupby(ids.to_numpy(), sort=False).cumsum().to_numpy()
+            s = c - np.minimum(0, pd.Series(c).groupby(ids.to_numpy(), sort=False).cummin().to_numpy())
+            # Sums of 0.1 steps land on the threshold ± 1 ulp, differently in one pass than in
+            # several folded batches; rounding makes the threshold checks agree
+            s = np.round(s, STAT_DECIMALS)
+            before = pd.Series(s).groupby(ids.to_numpy(), sort=False).shift(1).to_numpy()
+            return s, np.where(first, s0, before)
+
+        up, up_before = cusum(x - CUSUM_SLACK, up0)
+        down, down_before = cusum(-x - CUSUM_SLACK, down0)
+
+        # Alerts: |z| beyond the threshold, or a CUSUM crossing its threshold from below
+        events = [
+            ("z-score", np.abs(z) > Z_THRESHOLD, z),
+            ("CUSUM up", (up > CUSUM_THRESHOLD) & (up_before <= CUSUM_THRESHOLD), up),
+            ("CUSUM down", (down > CUSUM_THRESHOLD) & (down_before <= CUSUM_THRESHOLD), -down),
+        ]
+        alerts = pd.concat([
+            pd.DataFrame({
+                "Movie ID": ids[mask].to_numpy(), "Title": df["Title"][mask].to_numpy(),
+                "CheckedAt": df["CheckedAt"][mask].to_numpy(), "Alert": name,
+                "Rating Difference": x[mask], "EWMA": ewma[mask], "Statistic": stat[mask],
+            })
+            for name, mask, stat in events
+        ], ignore_index=True).sort_values(["CheckedAt", "Movie ID"], kind="stable").reset_index(drop=True)
+
+        state = pd.DataFrame({
+            "Title": df["Title"].to_numpy(), "n": n, "sum": total, "sumsq": total_sq, "ewma": ewma,
+            "cusum_up": up, "cusum_down": down, "last_diff": x, "last_checked": df["CheckedAt"].to_numpy(),
+        }, index=pd.Index(ids.to_numpy(), name="Movie ID"))[last]
+        return state, alerts
+
+
+# --- Live ratings collection, shared by scenario 14 and the headless collector ---
+LATEST_RUN_FILE = "latest_run.parquet"
+PREDICTIONS_FILE = "predictions.parquet"
+
+RESULT_COLUMNS = ["Title", "IMDb Rating (Static)", "IMDb Rating (Live)", "Rating Difference", "CheckedAt",
+                  "Movie ID", "Genre", "Director", "Year", "Num Votes", "Language"]
+PREDICTION_COLUMNS = ["Title", "IMDb Rating", "Genre", "Director", "Rating Difference", "Predicted Rating",
+                      "Features Considered"]
+
+
+def monitored_films(catalog, genre="Horror", n=250):
+    """The films scenario 14 monitors: the n highest-rated catalog films of one genre."""
+    films = catalog[catalog["Genre"].str.contains(genre, case=False, na=False)]
+    return films.sort_values(by="IMDb Rating", ascending=False).head(n).drop_duplicates(subset="Movie ID")
+
+
+def last_attempts(store, monitor, movie_ids):
+    """Last fetch attempt per Movie ID (NaT if never), aligned with movie_ids.
+
+    Attempts include films that produced no reading (not English, no OMDb rating); readings
+    from before attempts were recorded (e.g. the imported CSV) count as attempts too.
+    """
+    last = store.last_attempted().reindex(movie_ids)
+    return pd.to_datetime(last.fillna(monitor.state["last_checked"].reindex(movie_ids)).to_numpy())
+
+
+def least_recently_checked(films, store, monitor, limit=None):
+    """films reordered so never-attempted films come first, then the longest-unattempted ones."""
+    last = last_attempts(store, monitor, films["Movie ID"])
+    order = pd.Series(last).sort_values(na_position="first", kind="stable").index
+    return films.iloc[order[:limit]]
+
+
+def check_live_ratings(client, films, timestamp, on_progress=None):
+    """One row per English-language film with its live OMDb rating (None when OMDb had no answer)."""
+    films = films.set_index("Movie ID", drop=False)
+    results = []
+    # max_age=0: every reading comes from OMDb (a 304 confirms the stored body), never
+    # from the response cache, so a cached answer is not recorded as a new reading
+    fetched = client.fetch_many(films["Movie ID"], fields=["imdbRating", "Language"], max_age=0)
+    for done, (movie_id, resp) in enumerate(fetched, start=1):
+        if on_progress is not None:
+            on_progress(done, len(films))
+        row = films.loc[movie_id]
+        static_rating = row["IMDb Rating"]
+
+        try:
+            if resp and resp.get("Response") == "True":
+                # Normalize languages: split, strip, lowercase
+                languages = [lang.strip().lower() for lang in resp.get("Language", "").split(",")]
+                live_rating = float(resp.get("imdbRating", 0)) if resp.get("imdbRating") else None
+                if "english" not in languages:
+                    continue
+            else:
+                live_rating = None
+                languages = []
+        except Exception:
+            live_rating = None
+            languages = []
+
+        results.append({
+            "Title": row["Title"],
+            "IMDb Rating (Static)": static_rating,
+            "IMDb Rating (Live)": live_rating,
+            "Rating Difference": live_rating - static_rating if live_rating is not None else None,
+            "CheckedAt": timestamp,
+            "Movie ID": movie_id,
+            "Genre": row.get("Genre"),
+            "Director": row.get("Director"),
+            "Year": row.get("Year"),
+            "Num Votes": row.get("Num Votes"),
+            "Language": ", ".join([lang.capitalize() for lang in languages]),
+        })
+    return pd.DataFrame(results, columns=RESULT_COLUMNS)
+
+
+def predict_changed(view, feature_store, registry, latest):
+    """Predicted personal ratings for unseen films whose live rating differs from the catalog."""
+    changed = latest[latest["Rating Difference"].notna() & (latest["Rating Difference"] != 0)]
+    df_ml = view.frame.merge(changed[["Movie ID", "Rating Difference"]], on="Movie ID", how="inner")
+    predict_df = df_ml[df_ml["Your Rating"].isna()].copy()
+    train_idx = view.rated_idx
+
+    categorical_features = ["Genre", "Director"]
+    numerical_features = ["IMDb Rating", "Num Votes", "Year"]
+    X_all, _ = feature_store.design(categorical_features, numerical_features)
+    model = registry.get_or_fit(
+        IncrementalRandomForestRegressor(n_estimators=100, random_state=42),
+        X_all[train_idx], view.ratings[train_idx],
+        features=(categorical_features, numerical_features), row_ids=view.row_of[train_idx]
+    )
+
+    predict_rows = view.row_of.get_indexer(predict_df["Movie ID"])
+    predict_df["Predicted Rating"] = model.predict(X_all[predict_rows]) if len(predict_rows) else []
+    predict_df["Features Considered"] = explain_features(predict_df, categorical_features + numerical_features)
+    return predict_df[PREDICTION_COLUMNS].sort_values(by="Predicted Rating", ascending=False).reset_index(drop=True)
+
+
+def read_results(store, name, columns):
+    try:
+        return pd.read_parquet(os.path.join(store.root, name))
+    except (FileNotFoundError, OSError, ValueError):
+        return pd.DataFrame(columns=columns)
+
+
+def write_results(store, name, df):
+    path = os.path.join(store.root, name)
+    os.makedirs(store.root, exist_ok=True)
+    df.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+
+# --- Daily OMDb quota, shared by every collect pass and sweep run on the same key ---
+DAILY_API_BUDGET = 1000  # OMDb free-tier requests per day; a full sweep spans several days
+API_USAGE_FILE = "api_usage.json"
+
+
+def requests_today(store):
+    """OMDb requests already claimed today (one per film; retries are not counted)."""
+    try:
+        with open(os.path.join(store.root, API_USAGE_FILE)) as fh:
+            return json.load(fh).get(datetime.now().strftime("%Y-%m-%d"), 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def reserve_requests(store, wanted, budget=DAILY_API_BUDGET):
+    """Claim up to `wanted` of today's remaining requests before fetching; returns how many were granted."""
+    with store.locked():
+        used = requests_today(store)
+        granted = wanted if budget is None else max(0, min(wanted, budget - used))
+        path = os.path.join(store.root, API_USAGE_FILE)
+        with open(path + ".tmp", "w") as fh:
+            json.dump({datetime.now().strftime("%Y-%m-%d"): used + granted}, fh)  # earlier days dropped
+        os.replace(path + ".tmp", path)
+    return granted
+
+
+def collect(client, dataset, store, monitor, limit=None, registry=None, on_progress=None, budget=DAILY_API_BUDGET):
+    """One collection pass: fetch the least-recently-checked films, record them, precompute the UI tables."""
+    films = least_recently_checked(monitored_films(dataset.IMDB_Ratings), store, monitor.load(), limit)
+    films = films.head(reserve_requests(store, len(films), budget))
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    results = check_live_ratings(client, films, timestamp, on_progress)
+    store.record_attempts(films["Movie ID"], timestamp)
+    store.append(results[results["IMDb Rating (Live)"].notna()])
+    alerts = monitor.refresh()
+    store.compact()
+    publish(store, dataset, results, registry)
+    return results, alerts
+
+
+def publish(store, dataset, results, registry=None):
+    """Fold new readings into the latest-reading table and recompute the predictions the UI shows."""
+    with store.locked():
+        _publish(store, dataset, results, registry)
+
+
+def _publish(store, dataset, results, registry):
+    latest = read_results(store, LATEST_RUN_FILE, RESULT_COLUMNS)
+    latest = pd.concat([latest[~latest["Movie ID"].isin(results["Movie ID"])], results], ignore_index=True)
+    write_results(store, LATEST_RUN_FILE, latest)
+
+    view = build_ratings_view(dataset)
+    predictions = predict_changed(view, FeatureStore(view.frame), registry or ModelRegistry(), latest)
+    write_results(store, PREDICTIONS_FILE, predictions)
+
+
+# --- Full-catalog sweeps: Movie ID hash shards, run by priority, checkpointed per shard ---
+SWEEP_SHARDS = 64
+SWEEP_CHECKPOINT_FILE = "sweep_checkpoint.json"
+NEVER_CHECKED_DAYS = 30.0  # staleness given to films never attempted yet
+
+
+def shard_of(movie_ids, n_shards=SWEEP_SHARDS):
+    """Stable shard number per Movie ID (crc32, so identical across processes and restarts)."""
+    return np.array([zlib.crc32(str(m).encode()) % n_shards for m in movie_ids], dtype=np.int64)
+
+
+class SweepPlanner:
+    def __init__(self, store, n_shards=SWEEP_SHARDS):
+        self.store = store
+        self.n_shards = n_shards
+        self.path = os.path.join(store.root, SWEEP_CHECKPOINT_FILE)
+        self.lock = threading.Lock()
+
+    def plan(self, catalog, monitor, now=None):
+        """Work units, highest priority first: many votes and a long time since the last attempt."""
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        films = catalog.drop_duplicates(subset="Movie ID")
+        last = last_attempts(self.store, monitor, films["Movie ID"])
+        staleness = ((now - last) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+        staleness = np.where(np.isnan(staleness), NEVER_CHECKED_DAYS, np.maximum(staleness, 0.0))
+        votes = pd.to_numeric(films["Num Votes"], errors="coerce").fillna(0).to_numpy(dtype=float)
+        units = pd.DataFrame({
+            "shard": shard_of(films["Movie ID"], self.n_shards),
+            "films": 1,
+            "priority": np.log1p(votes) * (1.0 + staleness),
+            "staleness_days": staleness,
+        }).groupby("shard").agg(films=("films", "sum"), priority=("priority", "sum"),
+                                 staleness_days=("staleness_days", "mean"))
+        return units.sort_values("priority", ascending=False, kind="stable")
+
+    def checkpoint(self):
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, checkpoint):
+        os.makedirs(self.store.root, exist_ok=True)
+        with open(self.path + ".tmp", "w") as fh:
+            json.dump(checkpoint, fh)
+        os.replace(self.path + ".tmp", self.path)
+
+    def start(self, catalog, monitor):
+        """Begin a new sweep, or return the unfinished one so it resumes where it stopped."""
+        with self.lock, self.store.locked():
+            checkpoint = self.checkpoint()
+            if checkpoint and checkpoint["n_shards"] == self.n_shards and len(checkpoint["done"]) < len(checkpoint["order"]):
+                return checkpoint
+            checkpoint = {
+                "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "n_shards": self.n_shards,
+                "order": [int(s) for s in self.plan(catalog, monitor.load()).index],
+                "done": [],
+            }
+            self._write(checkpoint)
+            return checkpoint
+
+    def mark_done(self, shard):
+        with self.lock, self.store.locked():
+            checkpoint = self.checkpoint()
+            if shard not in checkpoint["done"]:
+                checkpoint["done"].append(int(shard))
+                self._write(checkpoint)
+
+    def progress(self):
+        """(shards done, shards in the sweep), (0, 0) before the first sweep."""
+        checkpoint = self.checkpoint()
+        return (len(checkpoint["done"]), len(checkpoint["order"])) if checkpoint else (0, 0)
+
+
+def sweep(client, dataset, store, monitor, planner, workers=4, budget=DAILY_API_BUDGET, registry=None, on_unit=None):
+    """Check pending shards of the current sweep under a worker pool, within what is left of today's budget."""
+    catalog = dataset.IMDB_Ratings.drop_duplicates(subset="Movie ID")
+    checkpoint = planner.start(catalog, monitor)
+    shards = shard_of(catalog["Movie ID"], planner.n_shards)
+    # A shard larger than what is left of the budget is split across runs: its films attempted
+    # since the sweep started (the attempts table is the per-film checkpoint) are not redone
+    attempted = store.last_attempted()
+    started = pd.Timestamp(checkpoint["started_at"])
+    pending = []
+    for shard in checkpoint["order"]:
+        if shard not in checkpoint["done"]:
+            films = catalog[shards == shard]
+            pending.append((shard, films[~(attempted.reindex(films["Movie ID"]).to_numpy() >= started)]))
+    granted = reserve_requests(store, sum(len(films) for _, films in pending), budget)
+    units, planned = [], 0
+    for shard, films in pending:
+        unit = films.head(granted - planned)
+        if unit.empty and not films.empty:
+            break
+        units.append((shard, unit, len(unit) == len(films)))
+        planned += len(unit)
+
+    def check_unit(shard, films, complete):
+        results = check_live_ratings(client, films, None)
+        checked_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        results["CheckedAt"] = checked_at  # stamped when stored
+        # Readings are stored before the shard is marked done: an interrupted shard is redone, never lost
+        store.append(results[results["IMDb Rating (Live)"].notna()])
+        store.record_attempts(films["Movie ID"], checked_at)
+        if complete:
+            planner.mark_done(shard)
+        return results
+
+    collected = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(check_unit, *unit): unit[0] for unit in units}
+            for future in as_completed(futures):
+                collected.append(future.result())
+                if on_unit is not None:
+                    on_unit(futures[future], len(collected), len(units))
+    finally:
+        # Drift state and UI tables are updated once, after every finished shard has been appended
+        alerts = monitor.refresh()
+        store.compact()
+        if collected:
+            publish(store, dataset, pd.concat(collected, ignore_index=True), registry)
+    results = pd.concat(collected, ignore_index=True) if collected else pd.DataFrame(columns=RESULT_COLUMNS)
+    return results, alerts
+
+
+# --- Headless collector: python live_ratings.py collect|sweep ... ---
+if __name__ == "__main__":
+    from movie_data import load_dataset
+    from omdb_client import MAX_WORKERS, OMDbClient, ResponseCache
+
+    parser = argparse.ArgumentParser(description="Live IMDb ratings collector for scenario 14.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    collect_parser = commands.add_parser("collect", help="fetch live ratings, least recently checked first")
+    collect_parser.add_argument("--api-key", default=os.environ.get("OMDB_API_KEY"),
+                                required="OMDB_API_KEY" not in os.environ)
+    collect_parser.add_argument("--limit", type=int, default=None, help="at most this many films per pass (API quota)")
+    collect_parser.add_argument("--every", type=float, default=None, help="repeat every this many minutes")
+    collect_parser.add_argument("--budget", type=int, default=DAILY_API_BUDGET,
+                                help="OMDb requests per day, shared with sweep")
+    sweep_parser = commands.add_parser("sweep", help="resume (or start) a full-catalog sweep")
+    sweep_parser.add_argument("--api-key", default=os.environ.get("OMDB_API_KEY"),
+                              required="OMDB_API_KEY" not in os.environ)
+    sweep_parser.add_argument("--budget", type=int, default=DAILY_API_BUDGET,
+                              help="OMDb requests per day, shared with collect")
+    sweep_parser.add_argument("--workers", type=int, default=4, help="shards checked concurrently")
+    sweep_parser.add_argument("--shards", type=int, default=SWEEP_SHARDS)
+    args = parser.parse_args()
+
+    # Sweep shards each run their own fetch_many, so the connection pool covers all of them
+    workers = args.workers if args.command == "sweep" else 1
+    client = OMDbClient(args.api_key, cache=ResponseCache(), pool_maxsize=workers * MAX_WORKERS)
+    store = HistoryStore()
+    monitor = DriftMonitor(store)
+    registry = ModelRegistry()
+    if args.command == "sweep":
+        dataset = load_dataset()
+        planner = SweepPlanner(store, args.shards)
+        results, alerts = sweep(
+            client, dataset, store, monitor, planner, args.workers, args.budget, registry,
+            on_unit=lambda shard, done, total: print(f"shard {shard} done ({done}/{total} this run)"),
+        )
+        done, total = planner.progress()
+        print(f"checked {len(results)} films, {len(alerts)} new drift alerts; sweep at {done}/{total} shards")
+    while args.command == "collect":
+        dataset = load_dataset()
+        if os.path.exists(HISTORY_CSV):
+            store.import_csv(HISTORY_CSV, dataset.IMDB_Ratings)
+        started = time.time()
+        results, alerts = collect(client, dataset, store, monitor, args.limit, registry, budget=args.budget)
+        print(f"{datetime.now():%Y-%m-%d %H:%M:%S} checked {len(results)} films, "
+              f"{len(alerts)} new drift alerts in {time.time() - started:.1f}s")
+        if args.every is None:
+            break
+        time.sleep(max(0.0, args.every * 60 - (time.time() - started)))
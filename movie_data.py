@@ -0,0 +1,318 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+
+# --- Source workbooks ---
+SOURCE_FILES = {
+    "imdb": "imdbratings.xlsx",
+    "imdb_2019": "imdbratings2019onwards.xlsx",  # New workbook
+    "my_ratings": "myratings.xlsx",
+    "votes": "votes.xlsx",  # Optional votes source
+}
+
+CACHE_DIR = os.environ.get("MOVIE_QUIZ_CACHE_DIR", ".cache")
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshot")
+SNAPSHOT_TABLES = ["IMDB_Ratings", "My_Ratings"]
+
+
+# --- Clean unnamed columns ---
+def clean_unnamed_columns(df):
+    return df.loc[:, ~df.columns.str.contains('^Unnamed')]
+
+
+# --- Source fingerprints (mtime + size, sha256 only when the stat changes) ---
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_signature(files=SOURCE_FILES):
+    signature = {}
+    for name, path in files.items():
+        try:
+            st_ = os.stat(path)
+            signature[name] = (st_.st_mtime_ns, st_.st_size)
+        except FileNotFoundError:
+            signature[name] = None
+    return signature
+
+
+def source_fingerprint(files=SOURCE_FILES, previous=None):
+    previous = previous or {}
+    fingerprint = {}
+    for name, stat in stat_signature(files).items():
+        if stat is None:
+            fingerprint[name] = None
+            continue
+        old = previous.get(name)
+        if old and (old["mtime_ns"], old["size"]) == stat:
+            sha = old["sha256"]
+        else:
+            sha = file_sha256(files[name])
+        fingerprint[name] = {"mtime_ns": stat[0], "size": stat[1], "sha256": sha}
+    return fingerprint
+
+
+def snapshot_version(fingerprint):
+    hashes = {name: (fp or {}).get("sha256") for name, fp in fingerprint.items()}
+    return hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# --- Build merged frames from the workbooks (slow path) ---
+def _arrow_safe(df):
+    # Object columns mixing str and int (e.g. titles like 1917) cannot be stored
+    # in Arrow, so keep the text but store every value as str.
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def build_frames(files=SOURCE_FILES):
+    IMDB_Ratings = pd.read_excel(files["imdb"])
+    IMDB_Ratings_2019 = pd.read_excel(files["imdb_2019"]) if os.path.exists(files["imdb_2019"]) else pd.DataFrame()
+    My_Ratings = pd.read_excel(files["my_ratings"])
+    Votes = pd.read_excel(files["votes"]) if os.path.exists(files["votes"]) else pd.DataFrame()
+
+    IMDB_Ratings = clean_unnamed_columns(IMDB_Ratings)
+    IMDB_Ratings_2019 = clean_unnamed_columns(IMDB_Ratings_2019)
+    My_Ratings = clean_unnamed_columns(My_Ratings)
+    Votes = clean_unnamed_columns(Votes)
+
+    # --- Append and remove duplicates ---
+    if not IMDB_Ratings_2019.empty:
+        IMDB_Ratings = pd.concat([IMDB_Ratings, IMDB_Ratings_2019], ignore_index=True)
+        IMDB_Ratings = IMDB_Ratings.drop_duplicates(subset=["Movie ID"], keep="last")
+
+    # --- Merge votes ---
+    if not Votes.empty:
+        IMDB_Ratings = IMDB_Ratings.merge(Votes, on="Movie ID", how="left")
+
+    return {
+        "IMDB_Ratings": _arrow_safe(IMDB_Ratings.reset_index(drop=True)),
+        "My_Ratings": _arrow_safe(My_Ratings.reset_index(drop=True)),
+    }
+
+
+# --- Snapshot on disk (uncompressed Feather so it can be memory-mapped) ---
+def _manifest_path(snapshot_dir):
+    return os.path.join(snapshot_dir, "manifest.json")
+
+
+def _read_manifest(snapshot_dir):
+    try:
+        with open(_manifest_path(snapshot_dir)) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_snapshot(frames, fingerprint, snapshot_dir):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    for name, df in frames.items():
+        tmp = os.path.join(snapshot_dir, f"{name}.feather.tmp")
+        feather.write_feather(df, tmp, compression="uncompressed")
+        os.replace(tmp, os.path.join(snapshot_dir, f"{name}.feather"))
+    return _write_manifest(fingerprint, snapshot_dir)
+
+
+def _write_manifest(fingerprint, snapshot_dir):
+    manifest = {"version": snapshot_version(fingerprint), "sources": fingerprint}
+    tmp = _manifest_path(snapshot_dir) + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp, _manifest_path(snapshot_dir))
+    return manifest
+
+
+def _read_snapshot(snapshot_dir):
+    frames = {}
+    for name in SNAPSHOT_TABLES:
+        path = os.path.join(snapshot_dir, f"{name}.feather")
+        frames[name] = feather.read_table(path, memory_map=True).to_pandas()
+    return frames
+
+
+def load_snapshot(files=SOURCE_FILES, snapshot_dir=SNAPSHOT_DIR):
+    """Return (frames, version), rebuilding the snapshot only if a workbook changed."""
+    manifest = _read_manifest(snapshot_dir)
+    previous = manifest["sources"] if manifest else None
+    fingerprint = source_fingerprint(files, previous)
+
+    if manifest and snapshot_version(fingerprint) == manifest["version"]:
+        try:
+            frames = _read_snapshot(snapshot_dir)
+            if fingerprint != previous:
+                # Touched but unchanged workbooks: refresh the stored mtimes only
+                _write_manifest(fingerprint, snapshot_dir)
+            return frames, manifest["version"]
+        except (FileNotFoundError, OSError):
+            pass
+
+    frames = build_frames(files)
+    manifest = _write_snapshot(frames, fingerprint, snapshot_dir)
+    return frames, manifest["version"]
+
+
+# --- Process-wide dataset shared by every session and scenario ---
+@dataclass(frozen=True)
+class MovieDataset:
+    IMDB_Ratings: pd.DataFrame
+    My_Ratings: pd.DataFrame
+    version: str
+
+    def frames(self):
+        # Shallow copies: no data is copied, but a scenario assigning a column
+        # only changes its own copy, never the shared frames.
+        return self.IMDB_Ratings.copy(deep=False), self.My_Ratings.copy(deep=False)
+
+
+def load_dataset(files=SOURCE_FILES, snapshot_dir=SNAPSHOT_DIR):
+    frames, version = load_snapshot(files, snapshot_dir)
+    My_Ratings = frames["My_Ratings"]
+    if not My_Ratings.empty:
+        My_Ratings['Year_Sort'] = pd.to_numeric(My_Ratings['Year'], errors='coerce')
+    return MovieDataset(frames["IMDB_Ratings"], My_Ratings, version)
+
+
+# --- Shared IMDB_Ratings <-> My_Ratings join on "Movie ID" ---
+class RatingsView:
+    def __init__(self, IMDB_Ratings, My_Ratings):
+        self.catalog = IMDB_Ratings
+        frame = IMDB_Ratings.copy(deep=False)
+        frame["Movie ID"] = frame["Movie ID"].astype("category")
+        # Integer row position of every catalog "Movie ID"
+        self.row_of = pd.Index(IMDB_Ratings["Movie ID"])
+        self._base = frame
+        self._set_ratings(self._rating_array(My_Ratings))
+
+    def _rating_array(self, My_Ratings):
+        ratings = np.full(len(self.row_of), np.nan)
+        if not My_Ratings.empty:
+            pos = self.row_of.get_indexer(My_Ratings["Movie ID"])
+            found = pos >= 0
+            ratings[pos[found]] = My_Ratings["Your Rating"].to_numpy(dtype=float)[found]
+        return ratings
+
+    def _set_ratings(self, ratings):
+        ratings.setflags(write=False)
+        self.ratings = ratings
+        self.rated_mask = ~np.isnan(ratings)
+        self.rated_idx = np.flatnonzero(self.rated_mask)
+        self.unrated_idx = np.flatnonzero(~self.rated_mask)
+        self.frame = self._base.assign(**{"Your Rating": ratings})
+
+    # Same rows as merge(how='inner') / the notna() and isna() halves of merge(how='left')
+    def rated(self):
+        return self.frame.iloc[self.rated_idx]
+
+    def unrated(self):
+        return self.frame.iloc[self.unrated_idx]
+
+    def with_ratings(self, My_Ratings):
+        # Only the rows whose rating changed are patched; the catalog columns are reused
+        new = self._rating_array(My_Ratings)
+        changed = np.flatnonzero(~((new == self.ratings) | (np.isnan(new) & np.isnan(self.ratings))))
+        if changed.size == 0:
+            return self
+        view = object.__new__(RatingsView)
+        view.catalog, view.row_of, view._base = self.catalog, self.row_of, self._base
+        ratings = self.ratings.copy()
+        ratings[changed] = new[changed]
+        view._set_ratings(ratings)
+        return view
+
+    def add_ratings(self, new_ratings):
+        current = pd.DataFrame({
+            "Movie ID": self.row_of[self.rated_idx],
+            "Your Rating": self.ratings[self.rated_idx],
+        })
+        merged = pd.concat([current, new_ratings[["Movie ID", "Your Rating"]]], ignore_index=True)
+        return self.with_ratings(merged.drop_duplicates(subset=["Movie ID"], keep="last"))
+
+
+def build_ratings_view(dataset, previous=None):
+    if previous is not None and previous.catalog.equals(dataset.IMDB_Ratings):
+        return previous.with_ratings(dataset.My_Ratings)
+    return RatingsView(dataset.IMDB_Ratings, dataset.My_Ratings)
+
+
+# --- Result cache for the editable SQL/Python text areas (LRU, bounded by memory) ---
+RESULT_CACHE_MB = float(os.environ.get("MOVIE_QUIZ_RESULT_CACHE_MB", "256"))
+
+CachedResult = namedtuple("CachedResult", ["value", "seconds", "nbytes"])
+
+
+def _result_nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sum(_result_nbytes(v) for v in value.values())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+def normalize_code(text):
+    # Trailing whitespace and blank lines do not change what a query/script computes
+    return "\n".join(line.rstrip() for line in text.strip().splitlines() if line.strip())
+
+
+class ResultCache:
+    def __init__(self, max_mb=RESULT_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(text, version, params=None):
+        digest = hashlib.sha256(normalize_code(text).encode()).hexdigest()
+        return digest, version, tuple(sorted((params or {}).items()))
+
+    def get(self, key):
+        with self.lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+            return entry
+
+    def put(self, key, value, seconds):
+        entry = CachedResult(value, seconds, _result_nbytes(value))
+        if entry.nbytes > self.max_bytes:
+            return entry
+        with self.lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            while self._items and self.nbytes + entry.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+            self._items[key] = entry
+            self.nbytes += entry.nbytes
+        return entry
+
+    def get_or_compute(self, text, version, params, compute):
+        """Return (entry, hit); compute() is only called on a miss."""
+        key = self.key(text, version, params)
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+        start = time.perf_counter()
+        value = compute()
+        return self.put(key, value, time.perf_counter() - start), False
@@ -0,0 +1,218 @@
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from sklearn.preprocessing import normalize
+
+
+# Movies drawn at most; bigger selections are sampled (their directors/genres kept)
+MAX_DRAW_MOVIES = 150
+MAX_LABELLED_NODES = 300
+LAYOUT_CACHE_ENTRIES = 64
+
+# When a name is used by several node types the later type wins (as add_node did)
+NODE_TYPES = ["movie", "director", "genre"]
+
+
+# --- Vectorized director→movie and movie→genre edge list ---
+def build_edge_list(df):
+    movies = df.dropna(subset=["Title"])
+    directed = movies.dropna(subset=["Director"])
+    genres = movies[["Title", "Genre"]].dropna(subset=["Genre"])
+    genres = genres.assign(Genre=genres["Genre"].astype(str).str.split(", ")).explode("Genre")
+    return pd.concat([
+        pd.DataFrame({"source": directed["Director"], "target": directed["Title"], "row": directed.index}),
+        pd.DataFrame({"source": genres["Title"], "target": genres["Genre"], "row": genres.index}),
+    ], ignore_index=True)
+
+
+def _node_types(df):
+    movies = df.dropna(subset=["Title"])
+    rank = pd.concat([
+        pd.Series(0, index=movies["Title"].to_numpy()),
+        pd.Series(1, index=movies["Director"].dropna().to_numpy()),
+        pd.Series(2, index=movies["Genre"].dropna().astype(str).str.split(", ").explode().to_numpy()),
+    ])
+    return rank.groupby(level=0).max().map(dict(enumerate(NODE_TYPES)))
+
+
+# --- Full-catalog graph, built once per dataset version; filters are subgraph views ---
+class MovieGraph:
+    def __init__(self, catalog):
+        self.catalog = catalog.reset_index(drop=True)
+        self.edges = build_edge_list(self.catalog)
+        self.graph = nx.from_pandas_edgelist(self.edges, "source", "target")
+        self.node_type = _node_types(self.catalog)
+        self.graph.add_nodes_from(self.node_type.index)
+        nx.set_node_attributes(self.graph, self.node_type.to_dict(), "type")
+        self._genre_lists = self.catalog["Genre"].astype(str).str.split(", ")
+        self._layouts = OrderedDict()
+        self.lock = threading.Lock()
+
+    def filter_rows(self, year="All", directors=None, genre="All"):
+        """Boolean mask over the catalog with the scenario 8 filter semantics."""
+        mask = pd.Series(True, index=self.catalog.index)
+        if year != "All":
+            mask &= self.catalog["Year"] == int(year)
+        if directors:
+            mask &= self.catalog["Director"].isin(directors)
+        if genre != "All":
+            mask &= self.catalog["Genre"].str.contains(genre, na=False)
+        return mask.to_numpy()
+
+    def subgraph(self, rows):
+        """Read-only view of the movies in rows plus their directors and genres."""
+        df = self.catalog[rows].dropna(subset=["Title"])
+        nodes = set(df["Title"]) | set(df["Director"].dropna())
+        nodes |= set(self._genre_lists.loc[df.index[df["Genre"].notna()]].explode())
+        # Only the edges of the selected rows: a remake sharing a title with a
+        # selected film must not pull in its own director and genres
+        edges = self.edges[rows[self.edges["row"].to_numpy()]]
+        edge_set = set(zip(edges["source"], edges["target"])) | set(zip(edges["target"], edges["source"]))
+        return nx.subgraph_view(
+            self.graph,
+            filter_node=nodes.__contains__,
+            filter_edge=lambda u, v: (u, v) in edge_set,
+        )
+
+    def sample(self, G, max_movies=MAX_DRAW_MOVIES, seed=42):
+        movies = sorted((n for n, t in G.nodes(data="type") if t == "movie"), key=str)
+        if len(movies) <= max_movies:
+            return G
+        keep = np.random.default_rng(seed).choice(len(movies), size=max_movies, replace=False)
+        nodes = {movies[i] for i in keep}
+        for movie in list(nodes):
+            nodes.update(G.neighbors(movie))
+        return G.subgraph(nodes)
+
+    def layout(self, G, seed=42):
+        # Same node set → same positions, so reruns and repeated filters skip the layout
+        key = hash(frozenset(G.nodes))
+        with self.lock:
+            if key in self._layouts:
+                self._layouts.move_to_end(key)
+                return self._layouts[key]
+        pos = nx.spring_layout(G, k=0.3, iterations=25, seed=seed)
+        with self.lock:
+            self._layouts[key] = pos
+            while len(self._layouts) > LAYOUT_CACHE_ENTRIES:
+                self._layouts.popitem(last=False)
+        return pos
+
+
+# --- Precomputed analytics over the full graph (sparse matrices, once per dataset version) ---
+PAGERANK_DAMPING = 0.85
+SIMILAR_DIRECTORS = 10
+
+
+def sparse_pagerank(A, damping=PAGERANK_DAMPING, tol=1e-10, max_iter=200):
+    n = A.shape[0]
+    out_degree = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out_degree == 0
+    inv_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+    walk = (sparse.diags(inv_degree) @ A).T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        new = damping * (walk @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(new - rank).sum() < n * tol:
+            return new
+        rank = new
+    return rank
+
+
+def top_k_cosine(M, k, chunk_size=512):
+    """(rows, neighbours, similarity) of the k most similar rows of M, excluding self."""
+    M = normalize(M.tocsr().astype(np.float32))
+    k = min(k, M.shape[0] - 1)
+    rows, cols, sims = [], [], []
+    for start in range(0, M.shape[0], chunk_size):
+        block = (M[start:start + chunk_size] @ M.T).toarray()
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = -np.inf
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k] if k > 0 else np.empty((len(block), 0), int)
+        top_sims = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        rows.append(np.repeat(np.arange(start, start + len(block)), k))
+        cols.append(np.take_along_axis(top, order, axis=1).ravel())
+        sims.append(np.take_along_axis(top_sims, order, axis=1).ravel())
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(sims)
+
+
+class GraphAnalytics:
+    def __init__(self, movie_graph, similar_directors=SIMILAR_DIRECTORS):
+        node_index = pd.Index(list(movie_graph.graph.nodes))
+        edges = movie_graph.edges[["source", "target"]].drop_duplicates()
+        i = node_index.get_indexer(edges["source"])
+        j = node_index.get_indexer(edges["target"])
+        A = sparse.coo_matrix((np.ones(len(i)), (i, j)), shape=(len(node_index),) * 2).tocsr()
+        A = ((A + A.T) > 0).astype(np.float64)
+        n_components, component = connected_components(A, directed=False)
+        # The genre hubs join almost everything into one component, so communities
+        # (densely linked director/movie/genre groups) come from Louvain modularity
+        community = np.empty(len(node_index), dtype=int)
+        for c, members in enumerate(nx.community.louvain_communities(movie_graph.graph, seed=42)):
+            community[node_index.get_indexer(list(members))] = c
+
+        # --- Node lookup table: degree, PageRank, connected component and community ---
+        self.nodes = pd.DataFrame({
+            "Type": movie_graph.node_type.reindex(node_index).to_numpy(),
+            "Degree": np.asarray(A.sum(axis=1)).ravel().astype(int),
+            "PageRank": sparse_pagerank(A),
+            "Component": component,
+            "Community": community,
+        }, index=node_index)
+        self.nodes["Community Size"] = self.nodes.groupby("Community")["Type"].transform("size")
+        self.n_components = n_components
+        self.n_communities = community.max() + 1 if len(community) else 0
+
+        # --- Director × genre counts (per film row, so shared titles do not mix) ---
+        catalog = movie_graph.catalog.dropna(subset=["Title", "Director", "Genre"])
+        pairs = pd.DataFrame({
+            "Director": catalog["Director"],
+            "Genre": movie_graph._genre_lists.loc[catalog.index],
+        }).explode("Genre")
+        directors = pd.Index(pairs["Director"].unique())
+        genres = pd.Index(pairs["Genre"].unique())
+        self.director_genres = sparse.coo_matrix(
+            (np.ones(len(pairs)), (directors.get_indexer(pairs["Director"]), genres.get_indexer(pairs["Genre"]))),
+            shape=(len(directors), len(genres)),
+        ).tocsr()
+        self.directors, self.genres = directors, genres
+
+        # --- Director-to-director similarity through shared genres (top-k per director) ---
+        rows, cols, sims = top_k_cosine(self.director_genres, similar_directors)
+        self.similar_directors = pd.DataFrame({
+            "Similar Director": directors[cols],
+            "Similarity": sims.round(3),
+        }, index=pd.Index(directors[rows], name="Director"))
+
+        # --- Genre → directors ranked by films in the genre, then PageRank ---
+        counts = self.director_genres.tocoo()
+        by_genre = pd.DataFrame({
+            "Genre": genres[counts.col],
+            "Director": directors[counts.row],
+            "Films in Genre": counts.data.astype(int),
+        })
+        by_genre["PageRank"] = self.nodes["PageRank"].reindex(by_genre["Director"]).to_numpy()
+        self.genre_directors = by_genre.sort_values(
+            ["Genre", "Films in Genre", "PageRank"], ascending=[True, False, False]
+        ).set_index("Genre")
+
+    def node_table(self, nodes, top=None):
+        """Analytics rows for the given nodes, highest PageRank first."""
+        table = self.nodes.loc[self.nodes.index.intersection(list(nodes))]
+        table = table.sort_values("PageRank", ascending=False)
+        return table.head(top) if top else table
+
+    def similar_to(self, director):
+        if director not in self.similar_directors.index:
+            return self.similar_directors.iloc[0:0]
+        return self.similar_directors.loc[[director]]
+
+    def top_directors(self, genre, n=10):
+        if genre not in self.genre_directors.index:
+            return self.genre_directors.iloc[0:0]
+        return self.genre_directors.loc[[genre]].head(n)
@@ -0,0 +1,327 @@
+import copy
+import glob
+import hashlib
+import math
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import get_scorer
+from sklearn.utils.validation import check_is_fitted
+
+from movie_data import CACHE_DIR
+
+
+MODEL_DIR = os.path.join(CACHE_DIR, "models")
+FEATURE_DIR = os.path.join(CACHE_DIR, "features")
+
+# Multi-genre strings ("Drama, Crime") become one column per genre
+MULTI_HOT = {"Genre": ", "}
+
+# Warm-start only small deltas, and refit from zero once the forest has doubled
+MAX_WARM_START_FRACTION = 0.2
+MAX_WARM_START_TREES = 2
+
+
+# --- Incrementally extendable models ---
+class AppendOnlyOneHotEncoder(TransformerMixin, BaseEstimator):
+    # One-hot encoder whose vocabulary only grows: new categories get new columns at
+    # the end, so trees fitted on an older vocabulary still read the same columns.
+    # Columns listed in multi_hot are split on their separator first (multi-hot).
+    def __init__(self, multi_hot=None):
+        self.multi_hot = multi_hot
+
+    def _tokens(self, X, j):
+        column = X.iloc[:, j]
+        sep = (self.multi_hot or {}).get(X.columns[j])
+        if sep is None:
+            return np.arange(len(X)), column.astype(object).to_numpy()
+        tokens = pd.Series(column.to_numpy(dtype=object)).str.split(sep).explode().str.strip()
+        return tokens.index.to_numpy(), tokens.to_numpy(dtype=object)
+
+    def fit(self, X, y=None):
+        for attr in ("categories_", "columns_", "n_columns_"):
+            self.__dict__.pop(attr, None)
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        X = pd.DataFrame(X)
+        if not hasattr(self, "categories_"):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            self.n_features_in_ = X.shape[1]
+            self.categories_ = [np.array([], dtype=object) for _ in range(X.shape[1])]
+            self.columns_ = [np.array([], dtype=int) for _ in range(X.shape[1])]
+            self.n_columns_ = 0
+        for j in range(X.shape[1]):
+            values = pd.unique(self._tokens(X, j)[1])
+            new = values[pd.Index(self.categories_[j]).get_indexer(values) < 0]
+            if len(new):
+                self.categories_[j] = np.concatenate([self.categories_[j], new.astype(object)])
+                self.columns_[j] = np.concatenate([self.columns_[j], np.arange(self.n_columns_, self.n_columns_ + len(new))])
+                self.n_columns_ += len(new)
+        return self
+
+    def transform(self, X):
+        check_is_fitted(self, "categories_")
+        X = pd.DataFrame(X)
+        rows, cols = [], []
+        for j in range(X.shape[1]):
+            # Unknown categories are ignored (all zeros), like handle_unknown='ignore'
+            positions, values = self._tokens(X, j)
+            idx = pd.Index(self.categories_[j]).get_indexer(values)
+            known = idx >= 0
+            rows.append(positions[known])
+            cols.append(self.columns_[j][idx[known]])
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        X_out = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(X), self.n_columns_))
+        X_out.data[:] = 1  # a genre repeated within one string still counts once
+        return X_out
+
+    def get_feature_names_out(self, input_features=None):
+        check_is_fitted(self, "categories_")
+        input_features = self.feature_names_in_ if input_features is None else input_features
+        names = np.empty(self.n_columns_, dtype=object)
+        for feature, cats, cols in zip(input_features, self.categories_, self.columns_):
+            names[cols] = [f"{feature}_{c}" for c in cats]
+        return names
+
+
+class IncrementalRandomForestRegressor(RandomForestRegressor):
+    # Trees added by warm_start may see more columns than the older trees did.
+    # Older trees never split on the new columns, so they only need to accept them.
+    def fit(self, X, y, sample_weight=None):
+        super().fit(X, y, sample_weight=sample_weight)
+        for tree in self.estimators_:
+            tree.n_features_in_ = self.n_features_in_
+        return self
+
+    @property
+    def feature_importances_(self):
+        check_is_fitted(self)
+        n = self.n_features_in_
+        all_importances = [
+            np.pad(tree.feature_importances_, (0, n - tree.tree_.n_features))
+            for tree in self.estimators_ if tree.tree_.node_count > 1
+        ]
+        if not all_importances:
+            return np.zeros(n, dtype=np.float64)
+        importances = np.mean(all_importances, axis=0, dtype=np.float64)
+        return importances / importances.sum()
+
+
+def row_hashes(X, y, row_ids=None):
+    # Identity of each training row, used to detect appended ratings
+    if row_ids is not None:
+        return pd.util.hash_pandas_object(pd.DataFrame({"id": np.asarray(row_ids), "y": np.asarray(y)}), index=False).to_numpy()
+    if isinstance(X, pd.DataFrame):
+        return pd.util.hash_pandas_object(X.assign(__target__=np.asarray(y)), index=False).to_numpy()
+    return None
+
+
+def _take(data, idx):
+    return data.iloc[idx] if isinstance(data, (pd.DataFrame, pd.Series)) else data[idx]
+
+
+# --- Registry keys: model spec (pipeline, features, hyperparameters) + training data ---
+def model_spec_hash(model, features=None):
+    # features are the input columns, not the expanded one-hot names: a new director
+    # or genre keeps the spec, so the registry warm-starts instead of refitting.
+    # n_jobs only changes how fast a model trains, not the fitted result
+    spec = clone(model)
+    spec.set_params(**{name: None for name in spec.get_params(deep=True) if name.endswith("n_jobs")})
+    return joblib.hash((spec, list(features) if features is not None else None))[:16]
+
+
+def training_data_hash(X, y):
+    digest = hashlib.sha256()
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X)
+        digest.update(repr(X.shape).encode())
+        for part in (X.data, X.indices, X.indptr):
+            digest.update(np.ascontiguousarray(part).tobytes())
+    else:
+        digest.update(repr(list(X.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _fold_score(model, X, y, train, test, scoring):
+    fitted = clone(model).fit(_take(X, train), _take(y, train))
+    return get_scorer(scoring)(fitted, _take(X, test), _take(y, test))
+
+
+# --- Fitted models persisted on disk and shared by every session and scenario ---
+class ModelRegistry:
+    def __init__(self, root=MODEL_DIR):
+        self.root = root
+        self._models = {}
+        self._cv_cache = {}
+        self._locks = {}
+        self.lock = threading.Lock()
+
+    def key(self, model, X, y, features=None):
+        if features is None and isinstance(X, pd.DataFrame):
+            features = list(X.columns)
+        return f"{model_spec_hash(model, features)}-{training_data_hash(X, y)}"
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.joblib")
+
+    def _key_lock(self, key):
+        with self.lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _load(self, key):
+        if key in self._models:
+            return self._models[key]
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        # Uncompressed dumps let joblib memory-map the large numpy arrays
+        fitted = joblib.load(path, mmap_mode="r")
+        self._models[key] = fitted
+        return fitted
+
+    def lookup(self, model, X, y, features=None):
+        return self._load(self.key(model, X, y, features))
+
+    def get_or_fit(self, model, X, y, features=None, row_ids=None):
+        key = self.key(model, X, y, features)
+        with self._key_lock(key):
+            fitted = self._load(key)
+            if fitted is None:
+                rows = row_hashes(X, y, row_ids)
+                fitted = self._warm_start(model, key, X, y, rows) if rows is not None else None
+                if fitted is None:
+                    fitted = clone(model).fit(X, y)
+                self._save(key, fitted, rows)
+            return fitted
+
+    def _previous(self, spec):
+        for path in glob.glob(os.path.join(self.root, f"{spec}-*.joblib")):
+            key = os.path.basename(path)[:-len(".joblib")]
+            rows_path = os.path.join(self.root, f"{key}.rows.npy")
+            if os.path.exists(rows_path):
+                return key, np.load(rows_path)
+        return None, None
+
+    def _warm_start(self, model, key, X, y, rows):
+        # Rows appended to My_Ratings: add trees in proportion to the delta
+        # instead of refitting the whole forest from zero.
+        spec = key.split("-")[0]
+        prev_key, prev_rows = self._previous(spec)
+        if prev_key is None or "warm_start" not in model.get_params():
+            return None
+        is_new = ~np.isin(rows, prev_rows)
+        n_delta = int(is_new.sum())
+        if not np.isin(prev_rows, rows).all() or n_delta == 0 or n_delta > MAX_WARM_START_FRACTION * len(rows):
+            return None
+
+        fitted = copy.deepcopy(self._load(prev_key))
+        n_more = math.ceil(model.n_estimators * n_delta / len(rows))
+        if len(fitted.estimators_) + n_more > MAX_WARM_START_TREES * model.n_estimators:
+            return None
+
+        # New directors/genres only add columns at the end of the design matrix
+        fitted.set_params(warm_start=True, n_estimators=len(fitted.estimators_) + n_more)
+        fitted.fit(X, y)
+        fitted.set_params(warm_start=False)
+        return fitted
+
+    def cv_scores(self, jobs, cv, scoring="neg_root_mean_squared_error", n_jobs=-1):
+        """Cross-validated scores for each (model, X, y[, features]) in jobs; cached ones are not recomputed."""
+        keys = [f"cv-{self.key(*job)}-{joblib.hash((cv, scoring))[:8]}" for job in jobs]
+        scores = [self._cv_cache.get(k) for k in keys]
+        for i, k in enumerate(keys):
+            path = os.path.join(self.root, f"{k}.npy")
+            if scores[i] is None and os.path.exists(path):
+                scores[i] = self._cv_cache[k] = np.load(path)
+
+        missing = [i for i, sc in enumerate(scores) if sc is None]
+        if missing:
+            # Every fold of every missing model goes into one worker pool
+            tasks = [(i, train, test) for i in missing for train, test in cv.split(jobs[i][1], jobs[i][2])]
+            fold_scores = Parallel(n_jobs=n_jobs)(
+                delayed(_fold_score)(jobs[i][0], jobs[i][1], jobs[i][2], train, test, scoring)
+                for i, train, test in tasks
+            )
+            os.makedirs(self.root, exist_ok=True)
+            for i in missing:
+                scores[i] = np.array([sc for (j, _, _), sc in zip(tasks, fold_scores) if j == i])
+                self._cv_cache[keys[i]] = scores[i]
+                np.save(os.path.join(self.root, f"{keys[i]}.npy"), scores[i])
+        return scores
+
+    def _save(self, key, fitted, rows):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._path(key) + ".tmp"
+        joblib.dump(fitted, tmp, compress=0)
+        os.replace(tmp, self._path(key))
+        if rows is not None:
+            np.save(os.path.join(self.root, f"{key}.rows.npy"), rows)
+        self._models[key] = fitted
+        # Only the newest training data is kept per model spec
+        spec = key.split("-")[0]
+        for old in glob.glob(os.path.join(self.root, f"{spec}-*.joblib")):
+            old_key = os.path.basename(old)[:-len(".joblib")]
+            if old_key != key:
+                os.remove(old)
+                if os.path.exists(os.path.join(self.root, f"{old_key}.rows.npy")):
+                    os.remove(os.path.join(self.root, f"{old_key}.rows.npy"))
+                self._models.pop(old_key, None)
+
+
+# --- Shared sparse design matrix over the whole catalog, one per dataset version ---
+class FeatureStore:
+    def __init__(self, frame, root=FEATURE_DIR):
+        self.frame = frame
+        self.root = root
+        self._designs = {}
+        self.lock = threading.Lock()
+
+    def _encoder(self, categorical):
+        # The vocabulary is persisted and only ever extended, so a column keeps its
+        # meaning across dataset versions and restarts (needed for warm-started models)
+        path = os.path.join(self.root, f"encoder-{joblib.hash(list(categorical))[:16]}.joblib")
+        encoder = joblib.load(path) if os.path.exists(path) else AppendOnlyOneHotEncoder(multi_hot=MULTI_HOT)
+        n_before = getattr(encoder, "n_columns_", None)
+        encoder.partial_fit(self.frame[categorical])
+        if encoder.n_columns_ != n_before:
+            os.makedirs(self.root, exist_ok=True)
+            joblib.dump(encoder, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        return encoder
+
+    def design(self, categorical, numerical):
+        """Return (CSR matrix for every catalog row, feature names); slice rows with X[idx]."""
+        key = (tuple(categorical), tuple(numerical))
+        with self.lock:
+            if key not in self._designs:
+                blocks = [sparse.csr_matrix(self.frame[list(numerical)].to_numpy(dtype=float))]
+                names = list(numerical)
+                if categorical:
+                    encoder = self._encoder(list(categorical))
+                    blocks.append(encoder.transform(self.frame[list(categorical)]))
+                    names += list(encoder.get_feature_names_out())
+                X = sparse.hstack(blocks, format="csr")
+                self._designs[key] = (X, np.array(names, dtype=object))
+            return self._designs[key]
+
+
+# --- "Features Considered" column for prediction tables ---
+def explain_features(df, features):
+    """Per-row "k=v, k=v" text for df, built column-wise; a feature df lacks shows as k=?."""
+    parts = [
+        f + "=" + df[f].astype(str).fillna("nan") if f in df.columns else pd.Series(f"{f}=?", index=df.index)
+        for f in dict.fromkeys(features)
+    ]
+    if not parts:
+        return pd.Series("", index=df.index, dtype=object)
+    return parts[0].str.cat(parts[1:], sep=", ") if len(parts) > 1 else parts[0]
@@ -0,0 +1,310 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+from movie_data import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers still merge with the file on disk, just without a lock
+    fcntl = None
+
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_DIR = os.path.join(CACHE_DIR, "embeddings")
+
+# Placeholder embedded when OMDb has no plot; never used as a neighbour
+MISSING_PLOT = "Plot missing"
+
+# Reviews are scored in chunks; a process pool is only worth starting for large pastes
+SENTIMENT_CHUNK = 64
+SENTIMENT_MIN_PARALLEL = 256
+SENTIMENT_CACHE_ENTRIES = 100_000
+
+
+def text_digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+# --- Persistent sentence-embedding store (one matrix per model, rows keyed by Movie ID) ---
+class EmbeddingStore:
+    def __init__(self, model_name=EMBEDDING_MODEL, root=EMBEDDING_DIR, dtype=np.float16, batch_size=64):
+        self.model_name = model_name
+        self.root = os.path.join(root, re.sub(r"[^\w.-]+", "_", model_name))
+        self.dtype = dtype
+        self.batch_size = batch_size
+        self._model = None
+        self.lock = threading.Lock()
+        self._load()
+
+    @property
+    def model(self):
+        # Loaded on first use and then kept for the life of the process
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def _paths(self):
+        return os.path.join(self.root, "vectors.npy"), os.path.join(self.root, "keys.json")
+
+    @staticmethod
+    def _stamp(path):
+        # Every save replaces keys.json, so a new inode marks a write even within one mtime tick
+        st_ = os.stat(path)
+        return st_.st_ino, st_.st_mtime_ns
+
+    def _load(self):
+        vectors_path, keys_path = self._paths()
+        try:
+            with open(keys_path) as fh:
+                meta = json.load(fh)
+            self.vectors = np.load(vectors_path, mmap_mode="r")
+            self.keys, self.digests = meta["keys"], meta["digests"]
+            self.stamp = self._stamp(keys_path)
+        except (FileNotFoundError, ValueError, KeyError):
+            self.vectors = np.empty((0, 0), dtype=self.dtype)
+            self.keys, self.digests = [], []
+            self.stamp = None
+        self.row_of = {key: i for i, key in enumerate(self.keys)}
+
+    def _reload(self):
+        try:
+            stamp = self._stamp(self._paths()[1])
+        except FileNotFoundError:
+            return False
+        if stamp == self.stamp:
+            return False
+        self._load()
+        return True
+
+    def refresh(self):
+        # Picks up rows written by another process (e.g. the offline index build)
+        with self.lock:
+            return self._reload()
+
+    @contextmanager
+    def _file_lock(self):
+        # Serializes writers across processes (the UI and `python movie_nlp.py`)
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        vectors_path, keys_path = self._paths()
+        with open(vectors_path + ".tmp", "wb") as fh:
+            np.save(fh, self.vectors)
+        with open(keys_path + ".tmp", "w") as fh:
+            json.dump({"model": self.model_name, "keys": self.keys, "digests": self.digests}, fh)
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(keys_path + ".tmp", keys_path)
+        self.vectors = np.load(vectors_path, mmap_mode="r")
+        self.stamp = self._stamp(keys_path)
+
+    def encode(self, texts):
+        """Encode texts in batches into unit-length float32 rows."""
+        if not texts:
+            return np.empty((0, self.vectors.shape[1] if self.vectors.size else 0), dtype=np.float32)
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, convert_to_numpy=True,
+            normalize_embeddings=True, show_progress_bar=False,
+        )
+        return vectors.astype(np.float32)
+
+    def lookup(self, keys, texts):
+        """Return the (len(keys), dim) float32 matrix, encoding only new or changed texts."""
+        keys, texts = list(keys), list(texts)
+        digests = [text_digest(t) for t in texts]
+        with self.lock:
+            self._reload()
+            missing = {}
+            for key, text, digest in zip(keys, texts, digests):
+                row = self.row_of.get(key)
+                if row is None or self.digests[row] != digest:
+                    missing[key] = (text, digest)
+            if missing:
+                self._add(missing)
+            rows = [self.row_of[key] for key in keys]
+            return np.asarray(self.vectors[rows], dtype=np.float32)
+
+    def labels(self, labels):
+        # Short strings such as genre names share the store under a "label:" prefix
+        return self.lookup([f"label:{label}" for label in labels], labels)
+
+    def _add(self, missing):
+        encoded = self.encode([text for text, _ in missing.values()]).astype(self.dtype)
+        with self._file_lock():
+            # Merge into what is on disk now, not this process's possibly stale copy
+            self._reload()
+            self._merge(missing, encoded)
+            self._save()
+
+    def _merge(self, missing, encoded):
+        vectors = np.array(self.vectors) if self.vectors.size else np.empty((0, encoded.shape[1]), self.dtype)
+        new_rows = []
+        for (key, (_, digest)), vector in zip(missing.items(), encoded):
+            row = self.row_of.get(key)
+            if row is None:
+                self.row_of[key] = len(self.keys)
+                new_rows.append(vector)
+                self.keys.append(key)
+                self.digests.append(digest)
+            else:
+                vectors[row] = vector
+                self.digests[row] = digest
+        if new_rows:
+            vectors = np.vstack([vectors, np.stack(new_rows)])
+        self.vectors = vectors
+
+
+# --- Batched review sentiment (TextBlob) with a per-review content-hash cache ---
+def _score_chunk(texts):
+    from textblob import TextBlob
+    return [tuple(TextBlob(text).sentiment) for text in texts]
+
+
+class SentimentEngine:
+    def __init__(self, max_workers=None, chunk_size=SENTIMENT_CHUNK,
+                 min_parallel=SENTIMENT_MIN_PARALLEL, max_entries=SENTIMENT_CACHE_ENTRIES):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_parallel = min_parallel
+        self.max_entries = max_entries
+        self._scores = {}
+        self.lock = threading.Lock()
+
+    def _remember(self, digests, scores):
+        with self.lock:
+            self._scores.update(zip(digests, scores))
+            while len(self._scores) > self.max_entries:
+                self._scores.pop(next(iter(self._scores)))
+
+    def _frame(self, reviews, positions, digests):
+        with self.lock:
+            scores = np.array([self._scores[digests[i]] for i in positions], dtype=float).reshape(-1, 2)
+        texts = pd.Series([reviews[i] for i in positions], dtype=object)
+        return pd.DataFrame({
+            "ReviewID": np.asarray(positions) + 1,
+            "Words": texts.str.split().str.len().to_numpy(),
+            "Sentiment": scores[:, 0].round(3),
+            "Subjectivity": scores[:, 1].round(3),
+            "Snippet": texts.str[:500].str.strip() + np.where(texts.str.len() > 500, "...", ""),
+        })
+
+    def stream(self, reviews):
+        """Yield DataFrames of scored reviews as each chunk finishes; cached reviews come first."""
+        reviews = list(reviews)
+        digests = [text_digest(r) for r in reviews]
+        with self.lock:
+            cached = [i for i, d in enumerate(digests) if d in self._scores]
+        if cached:
+            yield self._frame(reviews, cached, digests)
+
+        todo = sorted(set(range(len(reviews))) - set(cached))
+        chunks = [todo[k:k + self.chunk_size] for k in range(0, len(todo), self.chunk_size)]
+        if len(todo) >= self.min_parallel and self.max_workers > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(_score_chunk, [reviews[i] for i in chunk]): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    self._remember([digests[i] for i in chunk], future.result())
+                    yield self._frame(reviews, chunk, digests)
+        else:
+            for chunk in chunks:
+                self._remember([digests[i] for i in chunk], _score_chunk([reviews[i] for i in chunk]))
+                yield self._frame(reviews, chunk, digests)
+
+
+# --- Whole-catalog nearest-neighbour index over the stored plot embeddings ---
+class PlotIndex:
+    def __init__(self, store, movie_ids):
+        self.store = store
+        self.catalog_ids = pd.Index(pd.unique(pd.Series(movie_ids).dropna()))
+        self._n_keys = None
+        self.refresh()
+
+    def refresh(self):
+        """Refit when the store has gained rows; returns the number of indexed films."""
+        self.store.refresh()
+        with self.store.lock:
+            if len(self.store.keys) == self._n_keys:
+                return len(self.movie_ids)
+            missing = text_digest(MISSING_PLOT)
+            ids = [m for m in self.catalog_ids
+                   if m in self.store.row_of and self.store.digests[self.store.row_of[m]] != missing]
+            vectors = np.asarray(self.store.vectors[[self.store.row_of[m] for m in ids]], dtype=np.float32)
+            self._n_keys = len(self.store.keys)
+        self.movie_ids = np.array(ids, dtype=object)
+        self.vectors = vectors
+        self.position = {m: i for i, m in enumerate(ids)}
+        # Unit-length rows: brute-force cosine over the catalog is a single matrix product
+        self.nn = NearestNeighbors(metric="cosine", algorithm="brute").fit(vectors) if ids else None
+        return len(ids)
+
+    def recommend(self, liked_ids, exclude_ids=(), n=20, per_film=50):
+        """Rank films closest to any of liked_ids, skipping exclude_ids."""
+        columns = ["Movie ID", "Similarity", "Similar To"]
+        liked = [self.position[m] for m in liked_ids if m in self.position]
+        if self.nn is None or not liked:
+            return pd.DataFrame(columns=columns)
+        k = min(per_film + 1, len(self.movie_ids))
+        distances, neighbours = self.nn.kneighbors(self.vectors[liked], n_neighbors=k)
+        hits = pd.DataFrame({
+            "Movie ID": self.movie_ids[neighbours.ravel()],
+            "Similarity": 1 - distances.ravel(),
+            "Similar To": np.repeat(self.movie_ids[liked], k),
+        })
+        hits = hits[~hits["Movie ID"].isin(set(exclude_ids) | set(liked_ids))]
+        hits = hits.sort_values("Similarity", ascending=False).drop_duplicates("Movie ID")
+        return hits.head(n).reset_index(drop=True)[columns]
+
+
+def build_plot_embeddings(client, store, movie_ids, limit=None, chunk_size=256):
+    """Fetch and embed plots for catalog films not yet in the store; returns how many were added."""
+    todo = [m for m in pd.unique(pd.Series(movie_ids).dropna()) if m not in store.row_of][:limit]
+    added = 0
+    for start in range(0, len(todo), chunk_size):
+        chunk = todo[start:start + chunk_size]
+        plots = {}
+        for movie_id, response in client.fetch_many(chunk, fields=["Plot"], plot="full"):
+            plot = (response or {}).get("Plot")
+            plots[movie_id] = plot if plot and plot != "N/A" else MISSING_PLOT
+        store.lookup(list(plots), list(plots.values()))
+        added += len(plots)
+        print(f"embedded {start + len(chunk)}/{len(todo)} plots")
+    return added
+
+
+# --- Offline build: python movie_nlp.py [--limit N] ---
+if __name__ == "__main__":
+    from movie_data import load_dataset
+    from omdb_client import OMDbClient, ResponseCache
+
+    parser = argparse.ArgumentParser(description="Embed plots for every catalog film missing from the store.")
+    parser.add_argument("--api-key", default=os.environ.get("OMDB_API_KEY"), required="OMDB_API_KEY" not in os.environ)
+    parser.add_argument("--limit", type=int, default=None, help="at most this many new films (API quota)")
+    args = parser.parse_args()
+
+    dataset = load_dataset()
+    store = EmbeddingStore()
+    added = build_plot_embeddings(
+        OMDbClient(args.api_key, cache=ResponseCache()), store, dataset.IMDB_Ratings["Movie ID"], args.limit
+    )
+    indexed = PlotIndex(store, dataset.IMDB_Ratings["Movie ID"]).refresh()
+    print(f"added {added} films; {indexed}/{dataset.IMDB_Ratings['Movie ID'].nunique()} catalog films indexed")
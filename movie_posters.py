@@ -0,0 +1,201 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+from movie_data import CACHE_DIR
+
+
+POSTER_DIR = os.path.join(CACHE_DIR, "posters")
+POSTER_SIZE = (150, 150)
+
+# Colour histogram: 8 levels per channel (512 bins), shared by every poster
+LEVEL_BITS = 3
+N_BINS = 1 << (3 * LEVEL_BITS)
+N_COLOURS = 3
+FEATURE_BATCH = 256  # posters per histogram pass (bounds the temporary arrays)
+
+# Mean brightness upper bound → (mood, cluster, tag)
+MOOD_BANDS = [
+    (100, "dark and moody", "Cluster 0 – Thriller / Horror style", "🌑 Dark Thriller vibes"),
+    (170, "balanced", "Cluster 1 – Drama / Realistic style", "🎭 Dramatic tone"),
+    (np.inf, "bright and vivid", "Cluster 2 – Comedy / Family style", "😂 Lighthearted & Fun"),
+]
+
+FEATURE_COLUMNS = ["Poster URL", "Digest", "Colour 1", "Colour 2", "Colour 3",
+                   "Brightness", "Mood", "Cluster", "Mood Tag"]
+
+
+def to_hex(rgb):
+    return ["#%02x%02x%02x" % tuple(c) for c in np.clip(np.rint(rgb), 0, 255).astype(int)]
+
+
+# --- Colour features for a batch of posters in one vectorized pass ---
+def colour_features(pixels):
+    """pixels: (n, n_pixels, 3) uint8 → (dominant colours (n, 3, 3), mean brightness (n,))."""
+    n = len(pixels)
+    q = (pixels >> (8 - LEVEL_BITS)).astype(np.int64)
+    bins = (q[..., 0] << (2 * LEVEL_BITS)) | (q[..., 1] << LEVEL_BITS) | q[..., 2]
+    flat = (bins + np.arange(n)[:, None] * N_BINS).ravel()
+    counts = np.bincount(flat, minlength=n * N_BINS).reshape(n, N_BINS)
+    sums = np.stack([
+        np.bincount(flat, weights=pixels[..., c].ravel(), minlength=n * N_BINS).reshape(n, N_BINS)
+        for c in range(3)
+    ], axis=-1)
+
+    # Dominant colours = mean RGB of the most populated bins (the top bin repeats
+    # for posters with fewer distinct colours than N_COLOURS)
+    top = np.argsort(-counts, axis=1, kind="stable")[:, :N_COLOURS]
+    top_counts = np.take_along_axis(counts, top, axis=1)
+    top = np.where(top_counts > 0, top, top[:, :1])
+    top_counts = np.take_along_axis(counts, top, axis=1)
+    colours = np.take_along_axis(sums, top[..., None], axis=1) / top_counts[..., None]
+    return colours, pixels.reshape(n, -1).mean(axis=1)
+
+
+def mood_labels(brightness):
+    band = np.searchsorted([b[0] for b in MOOD_BANDS], brightness, side="right")
+    return [MOOD_BANDS[i][1:] for i in band]
+
+
+# --- Poster images in a content-addressed cache + per-Movie-ID colour features ---
+class PosterStore:
+    def __init__(self, root=POSTER_DIR, max_workers=8, timeout=(3.05, 20)):
+        self.root = root
+        self.image_dir = os.path.join(root, "images")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        os.makedirs(self.image_dir, exist_ok=True)
+        self._urls = self._read_json(self._path("urls.json"), {})
+        try:
+            self._features = pd.read_parquet(self._path("features.parquet"))
+        except (FileNotFoundError, OSError, ValueError):
+            self._features = pd.DataFrame(columns=FEATURE_COLUMNS, index=pd.Index([], name="Movie ID"))
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    @staticmethod
+    def _read_json(path, default):
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return default
+
+    def image_path(self, digest):
+        return os.path.join(self.image_dir, f"{digest}.img")
+
+    def _fetch(self, url):
+        resp = self.session.get(url, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.content
+        # Error pages served with 200 must not be stored as posters either
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.image_path(digest)
+        if not os.path.exists(path):
+            with open(path + ".tmp", "wb") as fh:
+                fh.write(data)
+            os.replace(path + ".tmp", path)
+        return digest
+
+    def _save_urls(self):
+        tmp = self._path("urls.json.tmp")
+        with open(tmp, "w") as fh:
+            json.dump(self._urls, fh)
+        os.replace(tmp, self._path("urls.json"))
+
+    def _forget(self, urls):
+        # Unreadable cached images (e.g. stored before downloads were validated) are fetched again next time
+        if not urls:
+            return
+        with self.lock:
+            for url in urls:
+                digest = self._urls.pop(url, None)
+                if digest is not None and digest not in self._urls.values() and os.path.exists(self.image_path(digest)):
+                    os.remove(self.image_path(digest))
+            self._save_urls()
+
+    def download(self, urls):
+        """Return {url: digest}, downloading concurrently only URLs not cached yet."""
+        urls = [u for u in dict.fromkeys(urls) if u and u != "N/A"]
+        with self.lock:
+            todo = [u for u in urls if u not in self._urls or not os.path.exists(self.image_path(self._urls[u]))]
+        if todo:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {url: pool.submit(self._fetch, url) for url in todo}
+            fetched = {}
+            for url, future in futures.items():
+                try:
+                    fetched[url] = future.result()
+                except (requests.RequestException, OSError, SyntaxError):  # PIL raises either for a corrupt image
+                    continue
+            with self.lock:
+                self._urls.update(fetched)
+                self._save_urls()
+        with self.lock:
+            return {u: self._urls[u] for u in urls if u in self._urls}
+
+    def _pixels(self, digest):
+        try:
+            with Image.open(self.image_path(digest)) as img:
+                return np.asarray(img.convert("RGB").resize(POSTER_SIZE)).reshape(-1, 3)
+        except OSError:
+            return None
+
+    def features(self, poster_urls):
+        """Colour features for a Series of poster URLs indexed by Movie ID; only new posters are computed."""
+        poster_urls = poster_urls[poster_urls.notna() & (poster_urls != "N/A")]
+        poster_urls = poster_urls[~poster_urls.index.duplicated(keep="last")]
+        with self.lock:
+            known = self._features.reindex(poster_urls.index)
+        stale = poster_urls[known["Poster URL"].to_numpy() != poster_urls.to_numpy()]
+
+        if not stale.empty:
+            digests = self.download(stale)
+            stale = stale[stale.isin(list(digests))]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                pixels = list(pool.map(self._pixels, [digests[u] for u in stale]))
+            self._forget([u for u, p in zip(stale, pixels) if p is None])
+            stale = stale[[p is not None for p in pixels]]
+            pixels = [p for p in pixels if p is not None]
+            if pixels:
+                batches = [colour_features(np.stack(pixels[k:k + FEATURE_BATCH]))
+                           for k in range(0, len(pixels), FEATURE_BATCH)]
+                colours = np.concatenate([b[0] for b in batches])
+                brightness = np.concatenate([b[1] for b in batches])
+                hexes = np.array([to_hex(c) for c in colours]).reshape(len(stale), N_COLOURS)
+                mood, cluster, tag = zip(*mood_labels(brightness))
+                new = pd.DataFrame({
+                    "Poster URL": stale.to_numpy(),
+                    "Digest": [digests[u] for u in stale],
+                    **{f"Colour {k + 1}": hexes[:, k] for k in range(N_COLOURS)},
+                    "Brightness": brightness.astype(np.float32),
+                    "Mood": mood,
+                    "Cluster": cluster,
+                    "Mood Tag": tag,
+                }, index=pd.Index(stale.index, name="Movie ID"))
+                with self.lock:
+                    merged = pd.concat([self._features.drop(new.index, errors="ignore"), new])
+                    tmp = self._path("features.parquet.tmp")
+                    merged.to_parquet(tmp)
+                    os.replace(tmp, self._path("features.parquet"))
+                    self._features = merged
+
+        with self.lock:
+            return self._features.reindex(poster_urls.index).dropna(subset=["Digest"])
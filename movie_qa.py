@@ -0,0 +1,89 @@
+import difflib
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+GENRES = ["comedy", "horror", "action", "drama", "sci-fi", "thriller", "romance"]
+
+# Fuzzy surname matching: only for longer tokens that are not question vocabulary
+FUZZY_CUTOFF = 0.8
+FUZZY_MIN_LENGTH = 5
+QUESTION_WORDS = {
+    "which", "what", "films", "movies", "show", "rated", "rating", "ratings", "directed",
+    "director", "highest", "lowest", "best", "worst", "bottom", "top", "about", "there",
+}
+
+Question = namedtuple("Question", ["text", "tokens", "genre", "directors", "fuzzy"])
+
+_TOKEN = re.compile(r"\b[\w']+\b")
+_WORD = re.compile(r"\w+")
+_END = object()
+
+
+# --- Precomputed question-understanding index over My_Ratings (built once per dataset version) ---
+class QAIndex:
+    def __init__(self, My_Ratings):
+        self.n_rows = len(My_Ratings)
+        genre_lower = My_Ratings["Genre"].astype("string").str.lower()
+        self.genre_rows = {g: genre_lower.str.contains(g, regex=False).fillna(False).to_numpy(dtype=bool)
+                           for g in GENRES}
+
+        directors = pd.Series(My_Ratings["Director"].dropna().unique(), dtype=object)
+        director_lower = My_Ratings["Director"].astype("string").str.lower()
+        self.director_codes, self.director_names = pd.factorize(director_lower)
+        self._code_of = {name: code for code, name in enumerate(self.director_names)}
+
+        # Surname (word tokens, as \b...\b would delimit them) → directors, as a token trie
+        self.trie = {}
+        self.surnames = {}
+        for d in directors:
+            surname = d.split()[-1].lower()
+            self.surnames.setdefault(surname, []).append(d)
+            node = self.trie
+            for token in _WORD.findall(surname):
+                node = node.setdefault(token, {})
+            node.setdefault(_END, []).append(d)
+        self._single_token = [s for s in self.surnames if len(_WORD.findall(s)) == 1]
+
+    def match_directors(self, words):
+        matches = []
+        for i in range(len(words)):
+            node = self.trie
+            for word in words[i:]:
+                node = node.get(word)
+                if node is None:
+                    break
+                matches.extend(node.get(_END, ()))
+        return list(dict.fromkeys(matches))
+
+    def fuzzy_directors(self, words):
+        matches = []
+        for word in words:
+            if len(word) < FUZZY_MIN_LENGTH or word in QUESTION_WORDS or word in GENRES:
+                continue
+            for surname in difflib.get_close_matches(word, self._single_token, n=3, cutoff=FUZZY_CUTOFF):
+                matches.extend(self.surnames[surname])
+        return list(dict.fromkeys(matches))
+
+    def parse(self, question):
+        text = question.lower()
+        tokens = set(_TOKEN.findall(text))
+        genre = next((g for g in GENRES if g in tokens or g in text), None)
+        words = _WORD.findall(text)
+        directors = self.match_directors(words)
+        # Misspelt surnames are only guessed for director questions: with a genre keyword
+        # present, words like "thrillers" would otherwise match surnames (Hiller)
+        fuzzy = not directors and genre is None
+        if fuzzy:
+            directors = self.fuzzy_directors(words)
+        return Question(text, tokens, genre, directors, fuzzy and bool(directors))
+
+    def all_rows(self):
+        return np.ones(self.n_rows, dtype=bool)
+
+    def director_rows(self, directors):
+        codes = [self._code_of[d.lower()] for d in directors if d.lower() in self._code_of]
+        return np.isin(self.director_codes, codes)
@@ -1,16 +1,26 @@
 import streamlit as st
 import pandas as pd
-import pandasql as ps
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestRegressor
 import lightgbm as lgb
 import numpy as np
 import logging
 import os
+import subprocess
+import sys
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.neighbors import NearestNeighbors
+from movie_data import ResultCache, build_ratings_view, load_dataset, stat_signature
+from movie_sql import build_sql_engine
+from movie_models import FeatureStore, IncrementalRandomForestRegressor, ModelRegistry, explain_features
+from movie_graph import MAX_LABELLED_NODES, GraphAnalytics, MovieGraph
+from movie_posters import PosterStore
+from movie_qa import QAIndex
+from movie_stats import paired_ttest_by
+from movie_nlp import MISSING_PLOT, EmbeddingStore, PlotIndex, SentimentEngine
+from omdb_client import OMDbClient, ResponseCache
+from live_ratings import (
+    HISTORY_CSV, LATEST_RUN_FILE, PREDICTION_COLUMNS, PREDICTIONS_FILE, RESULT_COLUMNS,
+    DAILY_API_BUDGET, DriftMonitor, HistoryStore, SweepPlanner, monitored_films, read_results, requests_today,
+)
 
 
 
@@ -22,39 +32,155 @@ st.set_page_config(
 
 st.title("IMDb/SQL/PYTHON Data Project 🎬")
 st.write("""
-This is a film/data project that integrates several Python libraries, including Pandas, PandasQL, NumPy, Streamlit, Scikit-learn, SciPy, TextBlob, Matplotlib, Seaborn, NetworkX and Sentence-Transformers. It also incorporates SQL, OMDb API, AI, GitHub, and IMDb - antfr99.
+This is a film/data project that integrates several Python libraries, including Pandas, SQLite, NumPy, Streamlit, Scikit-learn, SciPy, TextBlob, Matplotlib, Seaborn, NetworkX and Sentence-Transformers. It also incorporates SQL, OMDb API, AI, GitHub, and IMDb - antfr99.
 """)
 
-# --- Load Excel files ---
+# --- Load Excel files (one shared dataset per process, reloaded when a workbook changes) ---
+@st.cache_resource(max_entries=1, show_spinner="Loading IMDb and personal ratings...")
+def get_dataset(source_signature):
+    return load_dataset()
+
+
 try:
-    IMDB_Ratings = pd.read_excel("imdbratings.xlsx")
-    IMDB_Ratings_2019 = pd.read_excel("imdbratings2019onwards.xlsx")  # New workbook
-    My_Ratings = pd.read_excel("myratings.xlsx")
-    Votes = pd.read_excel("votes.xlsx")  # Optional votes source
+    dataset = get_dataset(tuple(sorted(stat_signature().items())))
+    snapshot_version = dataset.version
+    IMDB_Ratings, My_Ratings = dataset.frames()
 except Exception as e:
     st.error(f"Error loading Excel files: {e}")
+    snapshot_version = None
     IMDB_Ratings = pd.DataFrame()
-    IMDB_Ratings_2019 = pd.DataFrame()
     My_Ratings = pd.DataFrame()
-    Votes = pd.DataFrame()
 
-# --- Clean unnamed columns ---
-def clean_unnamed_columns(df):
-    return df.loc[:, ~df.columns.str.contains('^Unnamed')]
 
-IMDB_Ratings = clean_unnamed_columns(IMDB_Ratings)
-IMDB_Ratings_2019 = clean_unnamed_columns(IMDB_Ratings_2019)
-My_Ratings = clean_unnamed_columns(My_Ratings)
-Votes = clean_unnamed_columns(Votes)
+# --- SQL engine: tables registered once per dataset version, shared by all sessions ---
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_sql_engine(version, _dataset):
+    return build_sql_engine(_dataset)
+
+
+# --- Joined My_Ratings/IMDB_Ratings view, patched in place of a full rebuild when only ratings change ---
+@st.cache_resource(show_spinner=False)
+def ratings_view_holder():
+    return {}
+
+
+def get_ratings_view(version, dataset):
+    holder = ratings_view_holder()
+    if holder.get("version") != version:
+        holder["view"] = build_ratings_view(dataset, previous=holder.get("view"))
+        holder["version"] = version
+    return holder["view"]
+
+
+Ratings_View = get_ratings_view(snapshot_version, dataset) if snapshot_version else None
+
+
+# --- Result cache for the editable text areas (same text + data + widget values → same result) ---
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    return ResultCache()
+
+
+def cached_result(text, params, compute):
+    entry, hit = get_result_cache().get_or_compute(text, snapshot_version, params, compute)
+    if hit:
+        st.caption(f"⚡ Cached result – originally computed in {entry.seconds:.2f}s")
+    return entry.value
+
+
+# --- Fitted models persisted on disk, shared by all sessions and scenarios ---
+@st.cache_resource(show_spinner=False)
+def get_model_registry():
+    return ModelRegistry()
+
+
+Model_Registry = get_model_registry()
+
+
+# --- Sparse design matrix shared by the ML scenarios (10, 11, 12, 14) ---
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_feature_store(version, _ratings_view):
+    return FeatureStore(_ratings_view.frame)
+
+
+Feature_Store = get_feature_store(snapshot_version, Ratings_View) if snapshot_version else None
+
+
+# --- OMDb client: one keep-alive session and rate limit per API key, one on-disk response cache ---
+@st.cache_resource(show_spinner=False)
+def get_omdb_cache():
+    return ResponseCache()
+
+
+@st.cache_resource(show_spinner=False)
+def get_omdb_client(api_key):
+    return OMDbClient(api_key, cache=get_omdb_cache())
+
+
+# --- Sentence-embedding model and vectors, loaded once per process ---
+@st.cache_resource(show_spinner=False)
+def get_embedding_store():
+    return EmbeddingStore()
+
+
+# --- Director/movie/genre graph over the full catalog, built once per dataset version ---
+@st.cache_resource(max_entries=1, show_spinner="Building movie graph...")
+def get_movie_graph(version, _catalog):
+    return MovieGraph(_catalog)
+
+
+@st.cache_resource(max_entries=1, show_spinner="Computing graph analytics...")
+def get_graph_analytics(version, _movie_graph):
+    return GraphAnalytics(_movie_graph)
+
+
+# --- Poster image cache and per-Movie-ID colour/mood features ---
+@st.cache_resource(show_spinner=False)
+def get_poster_store():
+    return PosterStore()
+
+
+# --- Q&A index over My_Ratings: surname trie and genre bitmaps, built once per dataset version ---
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_qa_index(version, _My_Ratings):
+    return QAIndex(_My_Ratings)
+
+
+# --- Review sentiment scorer; per-review scores cached by content hash across reruns ---
+@st.cache_resource(show_spinner=False)
+def get_sentiment_engine():
+    return SentimentEngine()
+
+
+# --- Plot nearest-neighbour index over the whole catalog (built offline: python movie_nlp.py) ---
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_plot_index(version, _movie_ids):
+    return PlotIndex(get_embedding_store(), _movie_ids)
+
+
+# --- Live-ratings history: date-partitioned Parquet snapshots (the old CSV is imported once) ---
+@st.cache_resource(max_entries=1, show_spinner="Opening live ratings history...")
+def get_history_store(version, _catalog):
+    store = HistoryStore()
+    if os.path.exists(HISTORY_CSV):
+        store.import_csv(HISTORY_CSV, _catalog)
+    return store
 
-# --- Append and remove duplicates ---
-if not IMDB_Ratings_2019.empty:
-    IMDB_Ratings = pd.concat([IMDB_Ratings, IMDB_Ratings_2019], ignore_index=True)
-    IMDB_Ratings = IMDB_Ratings.drop_duplicates(subset=["Movie ID"], keep="last")
 
-# --- Merge votes ---
-if not Votes.empty:
-    IMDB_Ratings = IMDB_Ratings.merge(Votes, on="Movie ID", how="left")
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_drift_monitor(version, _history_store):
+    return DriftMonitor(_history_store)
+
+
+# --- Background live-ratings collector started from scenario 14 (one per server process) ---
+@st.cache_resource(show_spinner=False)
+def collector_process():
+    return {}
+
+
+def run_code(code, local_vars, outputs):
+    exec(code, {}, local_vars)
+    return {name: local_vars[name] for name in outputs if name in local_vars}
 
 # --- Show Tables ---
 st.write("---")
@@ -66,7 +192,6 @@ else:
 
 st.write("### My Ratings Table")
 if not My_Ratings.empty:
-    My_Ratings['Year_Sort'] = pd.to_numeric(My_Ratings['Year'], errors='coerce')
     My_Ratings_sorted = My_Ratings.sort_values(by="Year_Sort", ascending=False)
         # Rename column only for display
     display_ratings = My_Ratings_sorted.rename(columns={"Your Rating": "My Ratings"})
@@ -126,7 +251,7 @@ LIMIT 1000;"""
     user_query = st.text_area("Enter SQL query:", default_query_1, height=500, key="sql1")
     if st.button("Run SQL Query – Find my disagreements", key="run_sql1"):
         try:
-            result = ps.sqldf(user_query, {"IMDB_Ratings": IMDB_Ratings, "My_Ratings": My_Ratings})
+            result = cached_result(user_query, None, lambda: get_sql_engine(snapshot_version, dataset).query(user_query))
             st.dataframe(result, width="stretch", height=800)
         except Exception as e:
             st.error(f"Error in SQL query: {e}")
@@ -139,30 +264,41 @@ if scenario == "2 – Hybrid Recommendations (SQL)":
     - Director I liked before → +1 point  
     - Genre is Comedy or Drama → +0.5  
     - Other genres → +0.2
+
+    `Liked_Directors` is precomputed once (directors I rated 7+), and `:min_votes` is bound from the sidebar.
     """)
 
+    st.sidebar.header("SQL Parameters")
+    sql2_params = {"min_votes": st.sidebar.slider("Minimum IMDb Votes", 0, 500000, 40000, step=5000, key="sql2_min_votes")}
+
     default_query_2 = """SELECT ir.Title,
        ir.[IMDb Rating],
        ir.Director,
        ir.Genre,
        ir.Year,
-       CASE WHEN ir.Director IN (SELECT DISTINCT Director FROM My_Ratings WHERE [Your Rating] >= 7) THEN 1 ELSE 0 END AS Director_Bonus,
+       CASE WHEN ir.Director IN Liked_Directors THEN 1 ELSE 0 END AS Director_Bonus,
        CASE WHEN ir.Genre IN ('Comedy','Drama') THEN 0.5 ELSE 0.2 END AS Genre_Bonus,
        ir.[IMDb Rating] 
-       + CASE WHEN ir.Director IN (SELECT DISTINCT Director FROM My_Ratings WHERE [Your Rating] >= 7) THEN 1 ELSE 0 END
+       + CASE WHEN ir.Director IN Liked_Directors THEN 1 ELSE 0 END
        + CASE WHEN ir.Genre IN ('Comedy','Drama') THEN 0.5 ELSE 0.2 END AS Recommendation_Score
 FROM IMDB_Ratings ir
 LEFT JOIN My_Ratings pr
     ON ir.[Movie ID] = pr.[Movie ID]
 WHERE pr.[Your Rating] IS NULL
-  AND ir.[Num Votes] > 40000
+  AND ir.[Num Votes] > :min_votes
 ORDER BY Recommendation_Score DESC
 LIMIT 10000;"""
 
     user_query = st.text_area("Enter SQL query:", default_query_2, height=500, key="sql2")
     if st.button("Run SQL Query – Recommend movies", key="run_sql2"):
+        st.session_state["sql2_active"] = True
+    # Once run, moving a slider re-executes the same prepared query with new values
+    if st.session_state.get("sql2_active"):
         try:
-            result = ps.sqldf(user_query, {"IMDB_Ratings": IMDB_Ratings, "My_Ratings": My_Ratings})
+            result = cached_result(
+                user_query, sql2_params,
+                lambda: get_sql_engine(snapshot_version, dataset).query(user_query, sql2_params)
+            )
             st.dataframe(result, width="stretch", height=800)
         except Exception as e:
             st.error(f"Error in SQL query: {e}")
@@ -174,9 +310,16 @@ if scenario == "3 – Top Unseen Films by Decade (SQL)":
     st.header("3 – Top Unseen Films by Decade (SQL)")
     st.write("""
     Shows the highest-rated unseen films grouped by decade.  
-    Uses Python deduplication and limits results to the top 20 per decade.
+    Uses Python deduplication and limits results to the top N per decade.  
+    `:min_votes` and `:top_per_decade` are bound from the sidebar.
     """)
 
+    st.sidebar.header("SQL Parameters")
+    sql3_params = {
+        "min_votes": st.sidebar.slider("Minimum IMDb Votes", 0, 500000, 50000, step=5000, key="sql3_min_votes"),
+        "top_per_decade": st.sidebar.slider("Top films per decade", 5, 50, 20, step=5, key="sql3_top_n"),
+    }
+
     # Cleaner SQL – no redundant CTE
     default_query_3 = """
 SELECT *
@@ -197,9 +340,9 @@ FROM (
     LEFT JOIN My_Ratings pr
         ON ir.[Movie ID] = pr.[Movie ID]
     WHERE pr.[Your Rating] IS NULL
-      AND ir.[Num Votes] > 50000
+      AND ir.[Num Votes] > :min_votes
 ) ranked
-WHERE RankInDecade <= 20
+WHERE RankInDecade <= :top_per_decade
 ORDER BY Decade, [IMDb Rating] DESC, [Num Votes] DESC;
 """
 
@@ -208,8 +351,13 @@ ORDER BY Decade, [IMDb Rating] DESC, [Num Votes] DESC;
 
     # Run button
     if st.button("Run SQL Query – Top unseen films", key="run_sql3"):
+        st.session_state["sql3_active"] = True
+    if st.session_state.get("sql3_active"):
         try:
-            result = ps.sqldf(user_query, {"IMDB_Ratings": IMDB_Ratings, "My_Ratings": My_Ratings})
+            result = cached_result(
+                user_query, sql3_params,
+                lambda: get_sql_engine(snapshot_version, dataset).query(user_query, sql3_params)
+            )
             st.dataframe(result, width="stretch", height=800)
         except Exception as e:
             st.error(f"Error in SQL query: {e}")
@@ -236,39 +384,34 @@ if scenario == "10 – Predict My Ratings (ML)":
     """)
 
     ml_code = '''
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
+from movie_models import IncrementalRandomForestRegressor, explain_features
 
 
-df_ml = IMDB_Ratings.merge(My_Ratings[['Movie ID','Your Rating']], on='Movie ID', how='left')
-train_df = df_ml[df_ml['Your Rating'].notna()]
-predict_df = df_ml[df_ml['Your Rating'].isna()]
+train_idx = Ratings_View.rated_idx
+predict_idx = Ratings_View.unrated_idx
+predict_df = Ratings_View.unrated()
 
 
 categorical_features = ['Genre', 'Director']
 numerical_features = ['IMDb Rating', 'Num Votes', 'Year']
 
 
-preprocessor = ColumnTransformer(
-    transformers=[
-        ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features),
-        ('num', 'passthrough', numerical_features)
-    ]
-)
+# Sparse one-hot/multi-hot design matrix for the whole catalog (built once per dataset version);
+# new genres/directors only ever add columns at the end, so the registry can warm-start
+X_all, _ = Feature_Store.design(categorical_features, numerical_features)
 
-model = Pipeline([
-    ('prep', preprocessor),
-    ('reg', RandomForestRegressor(n_estimators=100, random_state=42))
-])
+model = IncrementalRandomForestRegressor(n_estimators=100, random_state=42)
 
 
-X_train = train_df[categorical_features + numerical_features]
-y_train = train_df['Your Rating']
-model.fit(X_train, y_train)
-X_pred = predict_df[categorical_features + numerical_features]
+X_train = X_all[train_idx]
+y_train = Ratings_View.ratings[train_idx]
+model = Model_Registry.get_or_fit(
+    model, X_train, y_train,
+    features=(categorical_features, numerical_features), row_ids=Ratings_View.row_of[train_idx]
+)
+X_pred = X_all[predict_idx]
 predict_df['Predicted Rating'] = model.predict(X_pred)
+predict_df['Features Considered'] = explain_features(predict_df, categorical_features + numerical_features)
 predict_df
 '''
 
@@ -280,12 +423,19 @@ predict_df
 
     if st.button("Run Python ML Code", key="run_ml"):
         try:
-            local_vars = {"IMDB_Ratings": IMDB_Ratings, "My_Ratings": My_Ratings}
-            exec(user_ml_code, {}, local_vars)
-            predict_df = local_vars['predict_df']
+            local_vars = {
+                "IMDB_Ratings": IMDB_Ratings,
+                "My_Ratings": My_Ratings,
+                "Ratings_View": Ratings_View,
+                "Feature_Store": Feature_Store,
+                "Model_Registry": Model_Registry
+            }
+            outputs = cached_result(user_ml_code, None, lambda: run_code(user_ml_code, local_vars, ["predict_df"]))
+            predict_df = outputs['predict_df']
             predict_df = predict_df[predict_df['Num Votes'] >= min_votes]
+            display_columns = ['Title','IMDb Rating','Genre','Director','Predicted Rating','Features Considered']
             st.dataframe(
-                predict_df[['Title','IMDb Rating','Genre','Director','Predicted Rating']]
+                predict_df[[c for c in display_columns if c in predict_df.columns]]
                 .sort_values(by='Predicted Rating', ascending=False)
                 .head(top_n)
                 .reset_index(drop=True)
@@ -305,10 +455,7 @@ if scenario == "4 – Statistical Insights by Genre (Agreement)":
     """)
 
     stats_code = '''
-df_compare = IMDB_Ratings.merge(
-    My_Ratings[['Movie ID','Your Rating']],
-    on='Movie ID', how='inner'
-)
+df_compare = Ratings_View.rated()
 
 df_compare['Agreement'] = (
     (df_compare['Your Rating'] - df_compare['IMDb Rating']).abs() <= 1
@@ -339,12 +486,12 @@ genre_agreement.sort_values(by='Agreement_%', ascending=False)
     if st.button("Run Statistical Analysis", key="run_stats5"):
         try:
             # Run the code entered in the text area
-            local_vars = {"IMDB_Ratings": IMDB_Ratings, "My_Ratings": My_Ratings}
-            exec(user_stats_code, {}, local_vars)
+            local_vars = {"IMDB_Ratings": IMDB_Ratings, "My_Ratings": My_Ratings, "Ratings_View": Ratings_View}
+            outputs = cached_result(user_stats_code, None, lambda: run_code(user_stats_code, local_vars, ["genre_agreement"]))
 
             # Retrieve dataframe if created
-            if "genre_agreement" in local_vars:
-                st.dataframe(local_vars["genre_agreement"], width="stretch", height=500)
+            if "genre_agreement" in outputs:
+                st.dataframe(outputs["genre_agreement"], width="stretch", height=500)
             else:
                 st.warning("No output dataframe named 'genre_agreement' was produced. Please check your code.")
 
@@ -365,6 +512,7 @@ The test checks whether the differences between my ratings and IMDb’s are stat
 
 - **t-statistic**: shows the size and direction of the difference (positive = I rate higher than IMDb, negative = I rate lower).  
 - **p-value**: shows whether the difference is statistically significant or could be due to chance. p < 0.05 (significant) → Unlikely the difference is due to chance. I consistently rate this director higher or lower than IMDb. 
+- **q-value**: the p-value adjusted for testing many directors at once (Benjamini–Hochberg). q < 0.05 → still significant after allowing for the number of directors tested.
 """)
 
     # Sidebar slider for minimum movies per director
@@ -372,48 +520,35 @@ The test checks whether the differences between my ratings and IMDb’s are stat
 
     # Editable t-test code
     ttest_code_director = f'''
-from scipy.stats import ttest_rel
 import numpy as np
 import pandas as pd
 
-df_ttest = IMDB_Ratings.merge(
-    My_Ratings[['Movie ID','Your Rating']],
-    on='Movie ID', how='inner'
-)
-
-results = []
+df_ttest = Ratings_View.rated()
 
-for director, group in df_ttest.groupby('Director'):
-    n = len(group)
-    if n >= {min_movies}:
-        differences = group['Your Rating'] - group['IMDb Rating']
-
-        
-        if differences.std() == 0:
-            stat, pval = np.nan, np.nan
-            interpretation = "All differences identical — t-test undefined"
-        else:
-            stat, pval = ttest_rel(group['Your Rating'], group['IMDb Rating'])
-            if pval < 0.05:
-                if n <= 2*{min_movies}:
-                    interpretation = "Significant (p < 0.05) — small sample, interpret cautiously"
-                else:
-                    interpretation = "Significant (p < 0.05)"
-            else:
-                interpretation = "Not Significant"
-
-        results.append({{
-            "Director": director,
-            "Num_Movies": n,
-            "Mean_IMDb": group['IMDb Rating'].mean().round(2),
-            "Mean_Mine": group['Your Rating'].mean().round(2),
-            "t_statistic": round(stat, 3) if not np.isnan(stat) else np.nan,
-            "p_value": round(pval, 4) if not np.isnan(pval) else np.nan,
-            "Interpretation": interpretation
-        }})
+# Paired t-test (my rating vs IMDb) for every director at once: per-director mean, std and n
+# of the differences from one groupby, then one call to the t distribution.
+# q_value = Benjamini–Hochberg adjusted p-value across all directors tested.
+tests = paired_ttest_by(df_ttest, 'Director', 'Your Rating', 'IMDb Rating', min_n={min_movies})
 
+significant = tests['p_value'] < 0.05
+interpretation = np.select(
+    [tests['t_statistic'].isna(), significant & (tests['n'] <= 2*{min_movies}), significant],
+    ["All differences identical — t-test undefined",
+     "Significant (p < 0.05) — small sample, interpret cautiously",
+     "Significant (p < 0.05)"],
+    default="Not Significant"
+)
 
-df_results = pd.DataFrame(results)
+df_results = pd.DataFrame({{
+    "Director": tests.index,
+    "Num_Movies": tests['n'].to_numpy(),
+    "Mean_IMDb": tests['mean_b'].round(2).to_numpy(),
+    "Mean_Mine": tests['mean_a'].round(2).to_numpy(),
+    "t_statistic": tests['t_statistic'].round(3).to_numpy(),
+    "p_value": tests['p_value'].round(4).to_numpy(),
+    "q_value": tests['q_value'].round(4).to_numpy(),
+    "Interpretation": interpretation
+}})
 df_results = df_results.sort_values(by="p_value")
 '''
 
@@ -421,11 +556,19 @@ df_results = df_results.sort_values(by="p_value")
 
     if st.button("Run t-test Analysis", key="run_ttest_director6"):
         try:
-            local_vars = {"IMDB_Ratings": IMDB_Ratings, "My_Ratings": My_Ratings}
-            exec(user_ttest_code_director, {}, local_vars)
+            local_vars = {
+                "IMDB_Ratings": IMDB_Ratings,
+                "My_Ratings": My_Ratings,
+                "Ratings_View": Ratings_View,
+                "paired_ttest_by": paired_ttest_by,
+            }
+            outputs = cached_result(
+                user_ttest_code_director, None,
+                lambda: run_code(user_ttest_code_director, local_vars, ["df_results"])
+            )
 
-            if "df_results" in local_vars:
-                st.dataframe(local_vars["df_results"], width="stretch", height=500)
+            if "df_results" in outputs:
+                st.dataframe(outputs["df_results"], width="stretch", height=500)
             else:
                 st.warning("No dataframe named 'df_results' was produced. Please check your code.")
 
@@ -506,42 +649,25 @@ I have never watch a movie about it :).Dont try to learn something about the fil
 
     # --- Full editable code block for this scenario ---
     review_code = f'''
-from textblob import TextBlob
 import pandas as pd
 
 # --- Reviews input ---
 reviews_text = """{reviews_text.strip()}"""
 
-# Convert multi-line text to list of reviews
+# Convert multi-line text to list of reviews (short ones are skipped)
 reviews = [r.strip() for r in reviews_text.split("\\n\\n") if r.strip()]
-
-review_records = []
-review_counter = 1
-for review in reviews:
-    words = review.split()
-    if len(words) < 5:
-        continue  
-
-    tb = TextBlob(review)
-    sentiment = tb.sentiment.polarity
-    subjectivity = tb.sentiment.subjectivity
-
-    snippet = review[:500].strip()
-    if not snippet:
-        continue
-
-    review_records.append({{
-        "ReviewID": review_counter,
-        "Words": len(words),
-        "Sentiment": round(sentiment, 3),
-        "Subjectivity": round(subjectivity, 3),
-        "Snippet": snippet + ("..." if len(review) > 500 else "")
-    }})
-    review_counter += 1
-
-df_reviews = pd.DataFrame(review_records)
-df_reviews.reset_index(drop=True, inplace=True)
-df_reviews['ReviewID'] = df_reviews.index + 1
+reviews = [r for r in reviews if len(r.split()) >= 5]
+
+# Score with TextBlob in batches (a process pool for large pastes);
+# reviews scored before are served from the cache, and results appear as each batch finishes
+scored = []
+for batch in Sentiment_Engine.stream(reviews):
+    scored.append(batch)
+    df_reviews = pd.concat(scored).sort_values("ReviewID")
+    show_progress(df_reviews)
+
+df_reviews = pd.concat(scored) if scored else pd.DataFrame(columns=["ReviewID", "Words", "Sentiment", "Subjectivity", "Snippet"])
+df_reviews = df_reviews.sort_values("ReviewID").reset_index(drop=True)
 '''
 
     # --- Editable code input (like Scenario 5) ---
@@ -553,13 +679,11 @@ df_reviews['ReviewID'] = df_reviews.index + 1
 
     # --- Run button ---
     if st.button("Run Sentiment Analysis", key="run_sentiment6"):
-        try:
-            local_vars = {}
-            exec(user_review_code, {}, local_vars)
-
-            if "df_reviews" in local_vars:
-                df_reviews = local_vars["df_reviews"]
+        live_results = st.empty()
 
+        def show_progress(df_reviews):
+            # Summary table and aggregate metrics, redrawn as scored batches arrive
+            with live_results.container():
                 st.subheader("Reviews Overview")
                 st.dataframe(df_reviews, width="stretch", height=400)
 
@@ -567,6 +691,14 @@ df_reviews['ReviewID'] = df_reviews.index + 1
                 st.write(f"**Average sentiment:** {df_reviews['Sentiment'].mean():.3f}")
                 st.write(f"**Average subjectivity:** {df_reviews['Subjectivity'].mean():.3f}")
 
+        try:
+            local_vars = {"Sentiment_Engine": get_sentiment_engine(), "show_progress": show_progress}
+            exec(user_review_code, {}, local_vars)
+
+            if "df_reviews" in local_vars:
+                df_reviews = local_vars["df_reviews"]
+                show_progress(df_reviews)
+
                 st.markdown("""
                 **What these metrics mean:**
                 - **Sentiment**: ranges from -1 (negative) to +1 (positive).  
@@ -625,51 +757,35 @@ if scenario == "11 – Model Evaluation (Feature Importance)":
     *(Requires a trained model from Scenario 9.)*
     """)
 
-    # --- Retrain model if not in session ---
-    if 'model' not in st.session_state:
-        st.warning("Model not found. Retrain here.")
-        if st.button("Run Scenario 9 ( Predit My Ratings ) Training Now"):
-            from sklearn.preprocessing import OneHotEncoder
-            from sklearn.ensemble import RandomForestRegressor
-            from sklearn.compose import ColumnTransformer
-            from sklearn.pipeline import Pipeline
-
-            df_ml = IMDB_Ratings.merge(My_Ratings[['Movie ID','Your Rating']], on='Movie ID', how='left')
-            train_df = df_ml[df_ml['Your Rating'].notna()]
-
-            # Treat Year as categorical
-            categorical_features = ['Genre', 'Director', 'Year']
-            numerical_features = ['IMDb Rating', 'Num Votes']
-
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features),
-                    ('num', 'passthrough', numerical_features)
-                ]
-            )
+    # --- Model spec (same features/hyperparameters → same registry entry) ---
+    train_idx = Ratings_View.rated_idx
+
+    # Treat Year as categorical
+    categorical_features = ['Genre', 'Director', 'Year']
+    numerical_features = ['IMDb Rating', 'Num Votes']
 
-            model = Pipeline([
-                ('prep', preprocessor),
-                ('reg', RandomForestRegressor(n_estimators=100, random_state=42))
-            ])
+    X_all, all_features = Feature_Store.design(categorical_features, numerical_features)
+    model = IncrementalRandomForestRegressor(n_estimators=100, random_state=42)
 
-            X_train = train_df[categorical_features + numerical_features]
-            y_train = train_df['Your Rating']
-            model.fit(X_train, y_train)
+    X_train = X_all[train_idx]
+    y_train = Ratings_View.ratings[train_idx]
 
-            st.session_state['model'] = model
+    # --- Load the persisted model; retrain (or warm-start) only if My_Ratings changed ---
+    trained_model = Model_Registry.lookup(
+        model, X_train, y_train, features=(categorical_features, numerical_features)
+    )
+    if trained_model is None:
+        st.warning("Model not found. Retrain here.")
+        if st.button("Run Scenario 9 ( Predit My Ratings ) Training Now"):
+            trained_model = Model_Registry.get_or_fit(
+                model, X_train, y_train,
+                features=(categorical_features, numerical_features), row_ids=Ratings_View.row_of[train_idx]
+            )
             st.success("Model trained successfully! You can now view feature importance.")
 
     # --- Show feature importance if model exists ---
-    if 'model' in st.session_state:
-        trained_model = st.session_state['model']
-        rf = trained_model.named_steps['reg']
-        preproc = trained_model.named_steps['prep']
-
-        # Feature names
-        cat_features = preproc.named_transformers_['cat'].get_feature_names_out(['Genre','Director','Year'])
-        numerical_features = ['IMDb Rating', 'Num Votes']
-        all_features = np.concatenate([cat_features, numerical_features])
+    if trained_model is not None:
+        rf = trained_model
         importances = rf.feature_importances_
 
         fi_df = pd.DataFrame({
@@ -762,17 +878,13 @@ if scenario == "12 – Feature Hypothesis Testing":
 
     if st.button("Run Test & Show Predictions"):
         import numpy as np
-        from sklearn.model_selection import cross_val_score, KFold
-        from sklearn.preprocessing import OneHotEncoder
-        from sklearn.compose import ColumnTransformer
-        from sklearn.pipeline import Pipeline
+        from sklearn.model_selection import KFold
         from sklearn.ensemble import RandomForestRegressor
         from scipy.stats import ttest_rel
         import matplotlib.pyplot as plt
 
         # --- Prepare training data ---
-        df_ml = IMDB_Ratings.merge(My_Ratings[['Movie ID','Your Rating']], on='Movie ID', how='left')
-        train_df = df_ml[df_ml['Your Rating'].notna()]
+        train_df = Ratings_View.rated()
         y = train_df['Your Rating']  # Target variable: your ratings
 
         # --- Baseline model (numeric only) ---
@@ -780,7 +892,7 @@ if scenario == "12 – Feature Hypothesis Testing":
         X_base = train_df[baseline_features]
         model_base = RandomForestRegressor(n_estimators=100, random_state=42)
         cv = KFold(n_splits=5, shuffle=True, random_state=42)
-        scores_base = -cross_val_score(model_base, X_base, y, cv=cv, scoring='neg_root_mean_squared_error')
+        cv_jobs = [(model_base, X_base, y)]
 
         # --- Feature-added model ---
         categorical_features = [f for f in selected_features if f in ['Director','Genre','Year']]
@@ -788,39 +900,32 @@ if scenario == "12 – Feature Hypothesis Testing":
         features_to_use = categorical_features + numerical_features
 
         if features_to_use:
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features),
-                    ('num', 'passthrough', numerical_features)
-                ]
-            )
-            X_test = train_df[features_to_use]
-            model_test = Pipeline([
-                ('prep', preprocessor),
-                ('reg', RandomForestRegressor(n_estimators=100, random_state=42))
-            ])
-            scores_test = -cross_val_score(model_test, X_test, y, cv=cv, scoring='neg_root_mean_squared_error')
+            X_all, _ = Feature_Store.design(categorical_features, numerical_features)
+            X_test = X_all[Ratings_View.rated_idx]
+            model_test = IncrementalRandomForestRegressor(n_estimators=100, random_state=42)
+            cv_jobs.append((model_test, X_test, y, (categorical_features, numerical_features)))
+
+            # --- Cross-validate both models in one parallel pass (baseline scores are cached) ---
+            scores_base, scores_test = [-sc for sc in Model_Registry.cv_scores(cv_jobs, cv)]
 
             # --- Paired t-test ---
             t_stat, p_val = ttest_rel(scores_base, scores_test)
 
-            # --- Retrain for predictions ---
-            model_test.fit(X_test, y)
+            # --- Retrain for predictions (forest trees built on all cores) ---
+            model_test = Model_Registry.get_or_fit(
+                model_test.set_params(n_jobs=-1), X_test, y,
+                features=(categorical_features, numerical_features), row_ids=Ratings_View.row_of[Ratings_View.rated_idx]
+            )
 
             # --- Predict all unseen movies ---
-            unseen_df = df_ml[df_ml['Your Rating'].isna()]
+            unseen_df = Ratings_View.unrated()
             if not unseen_df.empty:
-                X_unseen = unseen_df[features_to_use]
-                preds = model_test.predict(X_unseen)
+                preds = model_test.predict(X_all[Ratings_View.unrated_idx])
                 pred_df = unseen_df[['Movie ID','Title','Year','IMDb Rating']].copy()
                 pred_df['Predicted Rating'] = np.round(preds,1)
 
                 # --- Features considered per movie ---
-                features_list = []
-                for idx, row in unseen_df.iterrows():
-                    feature_values = {f: row.get(f,'?') for f in selected_features}
-                    features_list.append(", ".join([f"{k}={v}" for k,v in feature_values.items()]))
-                pred_df['Features Considered'] = features_list
+                pred_df['Features Considered'] = explain_features(unseen_df, selected_features)
 
                 # --- Sort by Year descending ---
                 pred_df = pred_df.sort_values(by='Year', ascending=False)
@@ -968,35 +1073,19 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import pandas as pd
 
-df_graph = IMDB_Ratings.copy()
-
-if selected_year != "All":
-    df_graph = df_graph[df_graph["Year"] == int(selected_year)]
-if selected_directors:
-    df_graph = df_graph[df_graph["Director"].isin(selected_directors)]
-if selected_genre != "All":
-    df_graph = df_graph[df_graph["Genre"].str.contains(selected_genre, na=False)]
-
-G = nx.Graph()
-for _, row in df_graph.iterrows():
-    movie = row.get("Title")
-    director = row.get("Director")
-    genre = row.get("Genre")
-
-    if pd.notna(movie):
-        G.add_node(movie, type="movie")
-    if pd.notna(director):
-        G.add_node(director, type="director")
-        G.add_edge(director, movie)
-    if pd.notna(genre):
-        for g in str(genre).split(", "):
-            G.add_node(g, type="genre")
-            G.add_edge(movie, g)
+# Rows matching the filters → view of the cached full-catalog graph
+# (Director → Movie and Movie → Genre edges, built once from a vectorized edge list)
+rows = Movie_Graph.filter_rows(selected_year, selected_directors, selected_genre)
+G = Movie_Graph.subgraph(rows)
+
+# Big selections are drawn from a sample of movies (with their directors and genres);
+# layouts are cached, so rerunning the same filters skips spring_layout
+G_draw = Movie_Graph.sample(G)
+pos = Movie_Graph.layout(G_draw)
 
 fig, ax = plt.subplots(figsize=(12, 8))
-pos = nx.spring_layout(G, k=0.3, iterations=25)
 color_map = []
-for node, data in G.nodes(data=True):
+for node, data in G_draw.nodes(data=True):
     if data["type"] == "movie":
         color_map.append("skyblue")
     elif data["type"] == "director":
@@ -1004,9 +1093,11 @@ for node, data in G.nodes(data=True):
     else:
         color_map.append("salmon")
 
-nx.draw(G, pos, with_labels=True, node_size=800, node_color=color_map, font_size=8, edge_color="gray", ax=ax)
+nx.draw(G_draw, pos, with_labels=len(G_draw) <= MAX_LABELLED_NODES, node_size=800, node_color=color_map, font_size=8, edge_color="gray", ax=ax)
 st.pyplot(fig)
 st.write(f"Graph built with **{len(G.nodes)} nodes** and **{len(G.edges)} edges**.")
+if len(G_draw) < len(G):
+    st.caption(f"Drawing a sample of {len(G_draw)} nodes; the counts above are for the full selection.")
 '''
 
     user_graph_code = st.text_area("Python Graph Code (editable)", graph_code, height=600)
@@ -1015,6 +1106,8 @@ st.write(f"Graph built with **{len(G.nodes)} nodes** and **{len(G.edges)} edges*
         try:
             local_vars = {
                 "IMDB_Ratings": IMDB_Ratings,
+                "Movie_Graph": get_movie_graph(snapshot_version, IMDB_Ratings),
+                "MAX_LABELLED_NODES": MAX_LABELLED_NODES,
                 "selected_year": selected_year,
                 "selected_directors": selected_directors,
                 "selected_genre": selected_genre,
@@ -1046,6 +1139,29 @@ This visualization helps you explore the movie dataset’s structure and uncover
         except Exception as e:
             st.error(f"Error running Graph Analysis code: {e}")
 
+    # --- Graph analytics: precomputed for the full catalog, looked up for the current filters ---
+    st.subheader("📈 Graph Analytics")
+    movie_graph = get_movie_graph(snapshot_version, IMDB_Ratings)
+    graph_analytics = get_graph_analytics(snapshot_version, movie_graph)
+    selection = movie_graph.subgraph(movie_graph.filter_rows(selected_year, selected_directors, selected_genre))
+
+    st.write(
+        f"Full catalog: **{len(graph_analytics.nodes)} nodes**, "
+        f"**{graph_analytics.n_components} connected components**, **{graph_analytics.n_communities} communities**."
+    )
+    st.write("**Most central nodes in the current selection (PageRank over the full catalog graph):**")
+    st.dataframe(graph_analytics.node_table(selection.nodes, top=15), use_container_width=True)
+
+    if selected_directors:
+        st.write("**Directors with the most similar genre mix (cosine similarity of director × genre counts):**")
+        st.dataframe(
+            pd.concat([graph_analytics.similar_to(d).head(5) for d in selected_directors]),
+            use_container_width=True
+        )
+    if selected_genre != "All":
+        st.write(f"**Leading {selected_genre} directors:**")
+        st.dataframe(graph_analytics.top_directors(selected_genre), use_container_width=True)
+
 
 
 
@@ -1057,10 +1173,7 @@ if scenario == "7 – Poster Image Analysis (OMDb API)":
     dominant colors, and an easy-to-understand mood analysis.
     """)
 
-    import requests
-    from PIL import Image
     import numpy as np
-    from sklearn.cluster import KMeans
 
     # --- Editable code block ---
     poster_code = '''
@@ -1068,46 +1181,32 @@ if scenario == "7 – Poster Image Analysis (OMDb API)":
 imdb_id = IMDB_Ratings.loc[IMDB_Ratings['Title'] == selected_film, 'Movie ID'].values[0]
 
 
-url = f"http://www.omdbapi.com/?i={imdb_id}&apikey={OMDB_API_KEY}"
-response = requests.get(url).json()
+response = omdb.movie(imdb_id, fields=["Poster"])
 poster_url = response.get('Poster')
 
-if poster_url and poster_url != "N/A":
-    img = Image.open(requests.get(poster_url, stream=True).raw).convert("RGB")
-    img_small = img.resize((150, 150))
-    img_array = np.array(img_small).reshape(-1, 3)
+# Poster downloaded once into the image cache; colours and mood are stored per Movie ID
+features = Poster_Store.features(pd.Series({imdb_id: poster_url})) if poster_url else pd.DataFrame()
 
-    
-    kmeans = KMeans(n_clusters=3, random_state=42).fit(img_array)
-    dominant_colors = kmeans.cluster_centers_
+if not features.empty:
+    poster = features.iloc[0]
+    dominant_colors = [poster["Colour 1"], poster["Colour 2"], poster["Colour 3"]]
 
     
-    st.image(poster_url, width=300)
+    st.image(Poster_Store.image_path(poster["Digest"]), width=300)
 
     
     st.write("🎨 Dominant Colors:")
     cols = st.columns(len(dominant_colors))
-    for idx, color in enumerate(dominant_colors.astype(int)):
-        hex_color = '#%02x%02x%02x' % tuple(color)
+    for idx, hex_color in enumerate(dominant_colors):
         cols[idx].markdown(
             "<div style='width:60px; height:60px; background:{}; border-radius:8px; border:1px solid #000'></div>".format(hex_color),
             unsafe_allow_html=True
         )
 
     
-    brightness = np.mean(img_array)
-    if brightness < 100:
-        mood = "dark and moody"
-        cluster_name = "Cluster 0 – Thriller / Horror style"
-        mood_tag = "🌑 Dark Thriller vibes"
-    elif brightness < 170:
-        mood = "balanced"
-        cluster_name = "Cluster 1 – Drama / Realistic style"
-        mood_tag = "🎭 Dramatic tone"
-    else:
-        mood = "bright and vivid"
-        cluster_name = "Cluster 2 – Comedy / Family style"
-        mood_tag = "😂 Lighthearted & Fun"
+    mood = poster["Mood"]
+    cluster_name = poster["Cluster"]
+    mood_tag = poster["Mood Tag"]
 
     
     st.success("🎬 Poster assigned to: **{}**".format(cluster_name))
@@ -1134,17 +1233,40 @@ else:
             local_vars = {
                 "IMDB_Ratings": IMDB_Ratings,
                 "selected_film": selected_film,
-                "OMDB_API_KEY": OMDB_API_KEY,
+                "omdb": get_omdb_client(OMDB_API_KEY),
+                "Poster_Store": get_poster_store(),
                 "st": st,
                 "np": np,
-                "KMeans": KMeans,
-                "requests": requests,
-                "Image": Image
+                "pd": pd
             }
             exec(user_poster_code, {}, local_vars)
         except Exception as e:
             st.error(f"Error running poster analysis: {e}")
 
+    # --- Palette of a whole filmography (posters fetched concurrently, features computed in one batch) ---
+    st.subheader("🎨 Director Palette")
+    poster_directors = sorted(IMDB_Ratings["Director"].dropna().unique())
+    palette_director = st.selectbox("Select a director:", poster_directors, key="poster_director7")
+
+    if st.button("Analyze Director's Posters", key="run_palette7"):
+        films = IMDB_Ratings.loc[IMDB_Ratings["Director"] == palette_director, ["Movie ID", "Title", "Year"]]
+        films = films.drop_duplicates(subset="Movie ID").set_index("Movie ID")
+        responses = get_omdb_client(OMDB_API_KEY).fetch_many(films.index, fields=["Poster"])
+        poster_urls = pd.Series({movie_id: (resp or {}).get("Poster") for movie_id, resp in responses}, dtype=object)
+        palette = films.join(get_poster_store().features(poster_urls), how="inner")
+
+        if palette.empty:
+            st.warning(f"No posters found for {palette_director}.")
+        else:
+            colour_cols = ["Colour 1", "Colour 2", "Colour 3"]
+            palette = palette.sort_values("Year")[["Title", "Year"] + colour_cols + ["Brightness", "Mood Tag"]]
+            st.dataframe(
+                palette.style.map(lambda c: f"background-color: {c}; color: {c}", subset=colour_cols)
+                .format({"Brightness": "{:.0f}"}),
+                use_container_width=True
+            )
+            st.write("**Mood mix:**", palette["Mood Tag"].value_counts().to_dict())
+
 
 
 
@@ -1169,48 +1291,50 @@ if scenario == "13 – Semantic Genre & Recommendations (Deep Learning / NLP)":
     # --- Hidden OMDb API key ---
     OMDB_API_KEY = "72466310"  # keep this private
 
-    # --- Cached function to fetch OMDb data ---
-    @st.cache_data(show_spinner=False)
-    def fetch_movie_data(title):
-        import requests
-        response = requests.get(f"http://www.omdbapi.com/?t={title}&apikey={OMDB_API_KEY}&plot=full").json()
-        plot = response.get("Plot") or "Plot missing"
+    # --- OMDb data by Movie ID (served from the on-disk response cache when fresh) ---
+    def movie_data(response, title):
+        response = response or {}
+        plot = response.get("Plot") if response.get("Plot") not in (None, "", "N/A") else MISSING_PLOT
         genres = response.get("Genre").split(", ") if response.get("Genre") else ["Unknown"]
         return {"Title": response.get("Title") or title, "Plot": plot, "Genre": genres}
 
     # --- Run button ---
     if st.button("Run Deep Learning Genre Analysis"):
         # Get all movies for the selected director dynamically
-        movies = IMDB_Ratings[IMDB_Ratings["Director"] == selected_director]["Title"].dropna().tolist()
+        movies = IMDB_Ratings.loc[
+            IMDB_Ratings["Director"] == selected_director, ["Movie ID", "Title"]
+        ].dropna(subset=["Title"]).itertuples(index=False, name=None)
+        movies = list(movies)
 
         if not movies:
             st.warning(f"No movies found for {selected_director}")
         else:
-            from sentence_transformers import SentenceTransformer, util
-            model = SentenceTransformer("all-MiniLM-L6-v2")
+            titles = dict(movies)
+            responses = dict(get_omdb_client(OMDB_API_KEY).fetch_many(titles, fields=["Plot", "Genre"], plot="full"))
+            films = [(movie_id, movie_data(responses.get(movie_id), title)) for movie_id, title in titles.items()]
 
-            results = []
+            # --- Embed every plot and each distinct genre label once, in batches ---
+            store = get_embedding_store()
+            plot_vectors = store.lookup([movie_id for movie_id, _ in films], [data["Plot"] for _, data in films])
+            genre_labels = sorted({g for _, data in films for g in data["Genre"]})
+            genre_vectors = store.labels(genre_labels)
 
-            for title in movies:
-                movie_data = fetch_movie_data(title)
-                plot = movie_data["Plot"]
-                genres = movie_data["Genre"]
+            # Rows are unit-length, so every plot/genre cosine similarity is one matrix product
+            similarity = plot_vectors @ genre_vectors.T
+            genre_col = {g: j for j, g in enumerate(genre_labels)}
 
-                # Compute plot embedding
-                plot_embedding = model.encode(plot, convert_to_tensor=True)
+            results = []
 
-                # Compute similarity for each genre
-                similarities = {}
-                for g in genres:
-                    g_embedding = model.encode(g, convert_to_tensor=True)
-                    sim = util.cos_sim(plot_embedding, g_embedding).item()
-                    similarities[g] = round(sim, 3)
+            for i, (movie_id, data) in enumerate(films):
+                plot = data["Plot"]
+                genres = data["Genre"]
+                similarities = {g: round(float(similarity[i, genre_col[g]]), 3) for g in genres}
 
                 # Main genre = highest similarity
                 main_genre = max(similarities, key=similarities.get) if similarities else "Unknown"
 
                 results.append({
-                    "Film": movie_data["Title"],
+                    "Film": data["Title"],
                     "OMDb Genres": ", ".join(genres),
                     "Embedding Similarity": similarities,
                     "Main Genre (Predicted)": main_genre,
@@ -1230,6 +1354,28 @@ if scenario == "13 – Semantic Genre & Recommendations (Deep Learning / NLP)":
             - This helps when OMDb lists multiple genres, showing the most semantically relevant one.
             """)
 
+    # --- Whole-catalog recommendations: unseen films whose plots are closest to my 9s and 10s ---
+    st.subheader("🎯 Films Like the Ones I Rated ≥ 9 (Plot Similarity)")
+    if st.button("Recommend Similar Unseen Films", key="run_plot_nn13"):
+        plot_index = get_plot_index(snapshot_version, IMDB_Ratings["Movie ID"])
+        n_indexed = plot_index.refresh()
+        liked_ids = Ratings_View.row_of[Ratings_View.rated_idx[Ratings_View.ratings[Ratings_View.rated_idx] >= 9]]
+        seen_ids = Ratings_View.row_of[Ratings_View.rated_idx]
+
+        recs = plot_index.recommend(liked_ids, exclude_ids=seen_ids, n=25)
+        if recs.empty:
+            st.info("No plot embeddings indexed yet – build them offline with `python movie_nlp.py`.")
+        else:
+            titles = IMDB_Ratings.drop_duplicates("Movie ID").set_index("Movie ID")
+            recs["Similarity"] = recs["Similarity"].round(3)
+            recs["Because I Liked"] = recs["Similar To"].map(titles["Title"])
+            recs = recs.join(titles[["Title", "Year", "Genre", "IMDb Rating"]], on="Movie ID")
+            st.caption(f"{n_indexed} of {len(titles)} catalog films indexed.")
+            st.dataframe(
+                recs[["Title", "Year", "Genre", "IMDb Rating", "Similarity", "Because I Liked"]],
+                use_container_width=True
+            )
+
 
 # --- Scenario 14: Live Ratings Monitor + Supervised ML Predictions (English only) ---
 if scenario == "14 – Live Ratings Monitor (MLOps + CI/CD + Monitoring)":
@@ -1244,160 +1390,83 @@ if scenario == "14 – Live Ratings Monitor (MLOps + CI/CD + Monitoring)":
 
 **Supervised Machine Learning:**  
 The model uses my existing ratings (`My_Ratings`) as training data to learn patterns in how I rate movies.  
-Given movie features (IMDb rating, genre, director, year, votes), the model predicts my rating for unseen films - Horror Films only.  
+Given movie features (IMDb rating, genre, director, year, votes), the model predicts my rating for unseen films - the top 250 Horror films, or the whole catalog once a full sweep has checked it.  
 """)
 
     # --- OMDb API key ---
     OMDB_API_KEY = "e9476c0a"
 
     # --- Select top 250 films ---
-    top250_films = IMDB_Ratings[
-    IMDB_Ratings['Genre'].str.contains("Horror", case=False, na=False)
-    ].sort_values(by="IMDb Rating", ascending=False).head(250)
-
-
-    # --- Run Button ---
-    if st.button("Run Live Ratings Check"):
-        import requests
-        from datetime import datetime
-        import os
-        import pandas as pd
-        import numpy as np
-        from sklearn.ensemble import RandomForestRegressor
-        from sklearn.preprocessing import OneHotEncoder
-        from sklearn.compose import ColumnTransformer
-        from sklearn.pipeline import Pipeline
-
-        history_file = "live_ratings_history.csv"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Load previous history
-        if os.path.exists(history_file):
-            history_df = pd.read_csv(history_file)
-        else:
-            history_df = pd.DataFrame()
-
-        results = []
-
-        # --- Fetch live ratings from OMDb using Movie ID (IMDb ID) ---
-        for _, row in top250_films.iterrows():
-            movie_id = row["Movie ID"]
-            static_rating = row["IMDb Rating"]
-
-            try:
-                url = f"http://www.omdbapi.com/?i={movie_id}&apikey={OMDB_API_KEY}"
-                resp = requests.get(url).json()
-
-                if resp.get("Response") == "True":
-                    # Normalize languages: split, strip, lowercase
-                    languages = [lang.strip().lower() for lang in resp.get("Language", "").split(",")]
-                    live_rating = float(resp.get("imdbRating", 0)) if resp.get("imdbRating") else None
-
-                   
-                    if "english" not in languages:
-                        continue
-                else:
-                    live_rating = None
-                    languages = []
-            except Exception:
-                live_rating = None
-                languages = []
-
-            rating_diff = live_rating - static_rating if live_rating is not None else None
-
-            results.append({
-                "Title": row["Title"],
-                "IMDb Rating (Static)": static_rating,
-                "IMDb Rating (Live)": live_rating,
-                "Rating Difference": rating_diff,
-                "CheckedAt": timestamp,
-                "Movie ID": movie_id,
-                "Genre": row.get("Genre"),
-                "Director": row.get("Director"),
-                "Year": row.get("Year"),
-                "Num Votes": row.get("Num Votes"),
-                "Language": ", ".join([lang.capitalize() for lang in languages])
-            })
-
-        new_df = pd.DataFrame(results)
-
-        # Only keep rows with non-zero rating differences if the column exists
-        if not new_df.empty and "Rating Difference" in new_df.columns:
-            new_df = new_df[new_df["Rating Difference"] != 0]
-        else:
-            new_df = pd.DataFrame()  # Ensure it’s still a DataFrame even if empty
-
-        st.success("Live ratings check complete ✅")
-
-        # --- Show sorted results by Rating Difference ---
-        if not new_df.empty:
-            st.subheader("📊 Current Run - Live Ratings Comparison")
-            st.dataframe(
-                new_df.sort_values(by="Rating Difference", ascending=False).reset_index(drop=True),
-                use_container_width=True
-            )
-        else:
-            st.warning("No English-language films with rating changes found in this run.")
-
-        # --- Supervised ML: Predict My Ratings for Movies with Changed Live Ratings ---
-        df_ml = IMDB_Ratings.merge(My_Ratings[['Movie ID','Your Rating']], on='Movie ID', how='left')
-        df_ml = df_ml.merge(new_df[['Movie ID','Rating Difference']], on='Movie ID', how='left')
-
-        # Only predict for unseen movies from the current Horror subset with rating changes
-        predict_df = df_ml[
-        (df_ml['Movie ID'].isin(top250_films['Movie ID'])) &
-        (df_ml['Rating Difference'].notna()) &
-        (df_ml['Your Rating'].isna())
-        ].copy()
-        train_df = df_ml[df_ml['Your Rating'].notna()]
-
-        categorical_features = ['Genre', 'Director']
-        numerical_features = ['IMDb Rating', 'Num Votes', 'Year']
-
-        preprocessor = ColumnTransformer(
-            transformers=[
-                ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features),
-                ('num', 'passthrough', numerical_features)
-            ]
+    top250_films = monitored_films(IMDB_Ratings)
+
+    History_Store = get_history_store(snapshot_version, IMDB_Ratings)
+    Drift_Monitor = get_drift_monitor(snapshot_version, History_Store).load()
+
+    # --- Run Button: the check runs in a separate collector process, this page only reads its results ---
+    scope = st.radio("Films to check:", ["Top 250 Horror films", "Full catalog (resumable sweep)"], horizontal=True)
+    collector = collector_process()
+    running = collector.get("process") is not None and collector["process"].poll() is None
+    if st.button("Run Live Ratings Check", disabled=running):
+        command = ["collect"] if scope.startswith("Top 250") else ["sweep"]
+        # Absolute script path and cwd (the app may be started from another directory); the key goes
+        # in the environment, not argv, so it does not show up in process listings
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        collector["process"] = subprocess.Popen(
+            [sys.executable, os.path.join(app_dir, "live_ratings.py"), *command],
+            cwd=app_dir, env={**os.environ, "OMDB_API_KEY": OMDB_API_KEY},
         )
+        running = True
+    if running:
+        st.info("Live ratings check running in the background – rerun the page to see the new results.")
+    st.caption("Scheduled checks: `python live_ratings.py collect --every 60` (least recently checked films first) "
+               "or `python live_ratings.py sweep` (whole catalog, resumes where the last run stopped); "
+               f"both draw on one budget of {DAILY_API_BUDGET} OMDb requests per day.")
+
+    # --- Full-catalog sweep: shards of the catalog, most-voted and stalest first ---
+    shards_done, shards_total = SweepPlanner(History_Store).progress()
+    if shards_total:
+        st.progress(shards_done / shards_total,
+                    text=f"Full-catalog sweep: {shards_done}/{shards_total} shards checked "
+                         f"({requests_today(History_Store)}/{DAILY_API_BUDGET} OMDb requests used today)")
+
+    latest_run = read_results(History_Store, LATEST_RUN_FILE, RESULT_COLUMNS)
+    new_df = latest_run[latest_run["Rating Difference"].notna() & (latest_run["Rating Difference"] != 0)]
+
+    # --- Show sorted results by Rating Difference ---
+    if not new_df.empty:
+        st.subheader("📊 Latest Live Ratings Comparison")
+        st.caption(f"Last checked at {latest_run['CheckedAt'].max()}")
+        st.dataframe(
+            new_df.sort_values(by="Rating Difference", ascending=False).reset_index(drop=True),
+            use_container_width=True
+        )
+    elif latest_run.empty:
+        st.warning("No live ratings collected yet – run a live ratings check.")
+    else:
+        st.warning("No English-language films with rating changes found in the latest check.")
 
-        model = Pipeline([
-            ('prep', preprocessor),
-            ('reg', RandomForestRegressor(n_estimators=100, random_state=42))
-        ])
-
-        X_train = train_df[categorical_features + numerical_features]
-        y_train = train_df['Your Rating']
-        model.fit(X_train, y_train)
-
-        X_pred = predict_df[categorical_features + numerical_features]
-        predict_df['Predicted Rating'] = model.predict(X_pred)
+    # --- Supervised ML: predictions precomputed by the collector after each check ---
+    predict_df = read_results(History_Store, PREDICTIONS_FILE, PREDICTION_COLUMNS)
+    if not predict_df.empty:
+        st.subheader("🤖 Predicted Ratings for Unseen Movies with Changed Ratings")
+        st.dataframe(predict_df, use_container_width=True)
+    elif not latest_run.empty:
+        st.info("No new movies available for prediction this run.")
 
-        if not predict_df.empty:
-            st.subheader("🤖 Predicted Ratings for Unseen Movies with Changed Ratings")
-            st.dataframe(
-                predict_df[['Title','IMDb Rating','Genre','Director','Rating Difference','Predicted Rating']]
-                .sort_values(by='Predicted Rating', ascending=False)
-                .reset_index(drop=True),
-                use_container_width=True
-            )
-        else:
-            st.info("No new movies available for prediction this run.")
-
-        # --- Explain how Python and packages make predictions ---
-        st.markdown("""
+    # --- Explain how Python and packages make predictions ---
+    st.markdown("""
 **How the Predictions Work (Technical Explanation):**  
 
 1. **Data Preparation**  
    - Features used: `Genre`, `Director` (categorical), `IMDb Rating`, `Num Votes`, `Year` (numerical).  
    - `My Rating` is the target variable for supervised learning.
 
-2. **Feature Encoding with `ColumnTransformer` and `OneHotEncoder`**  
-   - Categorical features are converted to **one-hot encoded vectors**.  
+2. **Feature Encoding with `FeatureStore` and `AppendOnlyOneHotEncoder`**  
+   - Categorical features are converted to **one-hot encoded vectors** in a sparse matrix built once for the whole catalog; new directors/genres get new columns at the end.  
    - Numerical features are passed through unchanged.  
 
-3. **Pipeline with `RandomForestRegressor`**  
-   - Combines preprocessing and model training.  
+3. **Model with `RandomForestRegressor`**  
+   - Trained on the rows of the shared feature matrix for the movies I have rated.  
    - Random forest is an **ensemble of decision trees**:  
      - Each tree predicts independently.  
      - The final prediction is the average across all trees.  
@@ -1415,6 +1484,55 @@ Given movie features (IMDb rating, genre, director, year, votes), the model pred
    - Random forests are robust to overfitting and can generalize well to unseen movies.
 """)
 
+    # --- Drift monitor: state and alerts are updated by the collector after each check ---
+    st.subheader("🚨 Rating Drift Monitor")
+    drift_state = Drift_Monitor.state
+    latest_alerts = Drift_Monitor.alerts[Drift_Monitor.alerts["CheckedAt"] == drift_state["last_checked"].max()]
+    if not latest_alerts.empty:
+        st.warning(f"{len(latest_alerts)} drift alert(s) raised by the latest check.")
+    if drift_state.empty:
+        st.info("No live ratings recorded yet – run a live ratings check to start monitoring.")
+    else:
+        st.markdown("""
+- **EWMA:** exponentially weighted average of the live − static rating difference (recent checks count most).  
+- **z-score:** how unusual the latest difference is compared with the film's earlier differences.  
+- **CUSUM:** cumulative drift up/down; an alert fires when it crosses the threshold, flagging a sustained shift rather than one noisy reading.
+""")
+        st.dataframe(
+            drift_state.assign(Checks=drift_state["n"].astype(int))
+            .rename(columns={"ewma": "EWMA", "cusum_up": "CUSUM Up", "cusum_down": "CUSUM Down",
+                             "last_diff": "Latest Difference", "last_checked": "Last Checked"})
+            [["Title", "Checks", "Latest Difference", "EWMA", "CUSUM Up", "CUSUM Down", "Last Checked"]]
+            .sort_values("EWMA", key=abs, ascending=False)
+            .head(50),
+            use_container_width=True
+        )
+        st.write("**Alerts (most recent first):**")
+        if Drift_Monitor.alerts.empty:
+            st.info("No drift alerts so far.")
+        else:
+            st.dataframe(
+                Drift_Monitor.alerts.sort_values("CheckedAt", ascending=False).head(100).reset_index(drop=True),
+                use_container_width=True
+            )
+
+    # --- Rating drift for one film, read from the date-partitioned history ---
+    st.subheader("📈 Rating History")
+    history_films = IMDB_Ratings[
+        IMDB_Ratings["Movie ID"].isin(top250_films["Movie ID"]) | IMDB_Ratings["Movie ID"].isin(Drift_Monitor.state.index)
+    ].drop_duplicates(subset="Movie ID")
+    history_label = st.selectbox(
+        "Film:", (history_films["Title"] + " (" + history_films["Movie ID"] + ")").tolist()
+    )
+    history_days = st.slider("Days of history:", 7, 365, 90)
+    if history_label:
+        drift_df = History_Store.drift(history_label.rsplit("(", 1)[1].rstrip(")"), days=history_days)
+        if drift_df.empty:
+            st.info(f"No live ratings recorded for this film in the last {history_days} days.")
+        else:
+            st.line_chart(drift_df.set_index("CheckedAt")[["IMDb Rating (Static)", "IMDb Rating (Live)"]])
+            st.dataframe(drift_df, use_container_width=True)
+
 
 # --- Scenario 9: Natural-Language Film Q&A Assistant (final version) ---
 
@@ -1445,40 +1563,29 @@ This scenario allows you to ask **natural-language questions** about my personal
     ]:
         st.write(f"- {q}")
 
-    try:
-        My_Ratings = pd.read_excel("myratings.xlsx")
-        IMDB_Ratings = pd.read_excel("imdbratings.xlsx")
-    except Exception as e:
-        st.error(f"Error loading Excel files: {e}")
-        My_Ratings = pd.DataFrame()
-        IMDB_Ratings = pd.DataFrame()
-
     # --- Editable logic code (cleaned: no unused comments or stopwords) ---
     logic_code = textwrap.dedent(r"""
-        question_lower = user_question.lower()
-        filtered = My_Ratings.copy()
-        question_tokens = set(re.findall(r"\b[\w']+\b", question_lower))
-
-        genres = ["comedy", "horror", "action", "drama", "sci-fi", "thriller", "romance"]
-        filtered_genre = False
-        for g in genres:
-            if g in question_tokens or g in question_lower:
-                filtered = filtered[filtered['Genre'].str.lower().str.contains(g, na=False)]
-                filtered_genre = True
-                break
-
-        all_directors = My_Ratings['Director'].dropna().unique()
-        matches = []
-
-        for d in all_directors:
-            last_name = d.split()[-1].lower()
-            if re.search(r'\b' + re.escape(last_name) + r'\b', question_lower):
-                matches.append(d)
+        question = QA_Index.parse(user_question)
+        question_lower = question.text
+        question_tokens = question.tokens
+        rows = QA_Index.all_rows()
+
+        # First genre keyword in the question → precomputed genre bitmap
+        filtered_genre = question.genre is not None
+        if filtered_genre:
+            rows &= QA_Index.genre_rows[question.genre]
+
+        # Director surnames found through the surname trie (close misspellings as a fallback)
+        matches = question.directors
+        if question.fuzzy:
+            st.caption(f"Matched director(s) by similar surname: {', '.join(matches)}")
 
         if matches:
-            filtered = filtered[filtered['Director'].str.lower().isin([m.lower() for m in matches])]
+            rows &= QA_Index.director_rows(matches)
         elif not filtered_genre:
-            filtered = filtered.iloc[0:0]
+            rows[:] = False
+
+        filtered = My_Ratings[rows]
 
         sort_col = "IMDb Rating" if "imdb" in question_lower else "Your Rating"
         if any(w in question_tokens for w in ["highest", "top", "best"]):
@@ -1498,7 +1605,13 @@ This scenario allows you to ask **natural-language questions** about my personal
     )
 
     if user_question and not My_Ratings.empty:
-        exec_ns = {"My_Ratings": My_Ratings, "user_question": user_question, "re": re}
+        exec_ns = {
+            "My_Ratings": My_Ratings,
+            "QA_Index": get_qa_index(snapshot_version, My_Ratings),
+            "user_question": user_question,
+            "re": re,
+            "st": st,
+        }
         try:
             exec(editable_code, exec_ns)
         except Exception as e:
@@ -1513,7 +1626,7 @@ This scenario allows you to ask **natural-language questions** about my personal
 
         if not filtered.empty:
             filtered_sorted = filtered.sort_values(by=sort_col, ascending=ascending)
-            st.dataframe(filtered_sorted)
+            st.dataframe(filtered_sorted.drop(columns=['Year_Sort'], errors='ignore'))
         else:
             st.info("No matching films found. Try a different director surname or genre keyword.")
 
@@ -0,0 +1,68 @@
+import sqlite3
+import threading
+
+import pandas as pd
+
+
+# --- Long-lived SQL engine: tables are registered once and reused by every query ---
+# SQLite keeps the [bracket] identifier quoting used by the scenario queries
+# working unchanged (the same dialect pandasql ran them in).
+class SQLiteEngine:
+    def __init__(self, tables=None, indexes=None, database=":memory:", cached_statements=256):
+        self.conn = sqlite3.connect(database, check_same_thread=False, cached_statements=cached_statements)
+        self.lock = threading.Lock()
+        indexes = indexes or {}
+        for name, df in (tables or {}).items():
+            self.register(name, df, indexes.get(name, ()))
+
+    def register(self, name, df, index_columns=()):
+        with self.lock:
+            self.conn.execute("PRAGMA query_only = OFF")
+            try:
+                df.to_sql(name, self.conn, index=False, if_exists="replace")
+                self._create_indexes(name, index_columns)
+                self.conn.execute("ANALYZE")
+                self.conn.commit()
+            finally:
+                # Shared across sessions, so user queries must not modify the tables
+                self.conn.execute("PRAGMA query_only = ON")
+
+    def materialize(self, name, sql, index_columns=()):
+        # Common subqueries are computed once per dataset version and stored as tables
+        with self.lock:
+            self.conn.execute("PRAGMA query_only = OFF")
+            try:
+                self.conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+                self.conn.execute(f'CREATE TABLE "{name}" AS {sql}')
+                self._create_indexes(name, index_columns)
+                self.conn.commit()
+            finally:
+                self.conn.execute("PRAGMA query_only = ON")
+
+    def query(self, sql, params=None):
+        # Named parameters (:min_votes) are bound, not formatted into the text, so the
+        # compiled statement for a given query text is reused from the connection's
+        # statement cache when only the widget values change.
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params or {})
+
+    def _create_indexes(self, name, index_columns):
+        for col in index_columns:
+            idx_name = f"idx_{name}_{col}".replace(" ", "_")
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS "{idx_name}" ON "{name}" ([{col}])')
+
+
+# --- Materialized subqueries shared by the SQL scenarios ---
+MATERIALIZED = {
+    "Liked_Directors": ("SELECT DISTINCT Director FROM My_Ratings WHERE [Your Rating] >= 7", ["Director"]),
+}
+
+
+def build_sql_engine(dataset):
+    engine = SQLiteEngine(
+        {"IMDB_Ratings": dataset.IMDB_Ratings, "My_Ratings": dataset.My_Ratings},
+        indexes={"IMDB_Ratings": ["Movie ID", "Director"], "My_Ratings": ["Movie ID"]},
+    )
+    for name, (sql, index_columns) in MATERIALIZED.items():
+        engine.materialize(name, sql, index_columns)
+    return engine
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+# --- Multiple-comparison correction ---
+def benjamini_hochberg(p_values):
+    """Benjamini–Hochberg adjusted p-values (q-values); NaN stays NaN and is not counted."""
+    p = np.asarray(p_values, dtype=float)
+    q = np.full(p.shape, np.nan)
+    tested = np.flatnonzero(~np.isnan(p))
+    m = len(tested)
+    if m == 0:
+        return q
+    order = tested[np.argsort(p[tested], kind="stable")]
+    scaled = p[order] * m / np.arange(1, m + 1)
+    q[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1.0)
+    return q
+
+
+# --- Paired t-tests for every group at once ---
+def paired_ttest_by(df, by, a, b, min_n=2, sep=None):
+    """Paired t-test of df[a] vs df[b] within each group of df[by] (same result as ttest_rel per group).
+
+    Multi-valued group columns (e.g. "Drama, Crime") are split on sep so a row
+    counts towards every group it lists. Rows missing a or b are left out.
+    """
+    data = pd.DataFrame({"group": df[by], "a": df[a], "b": df[b]}).dropna()
+    if sep is not None:
+        data = data.assign(group=data["group"].astype(str).str.split(sep)).explode("group")
+        data["group"] = data["group"].str.strip()
+    data["d"] = data["a"] - data["b"]
+
+    summary = data.groupby("group", sort=True).agg(
+        n=("d", "size"), mean_a=("a", "mean"), mean_b=("b", "mean"),
+        mean_d=("d", "mean"), std_d=("d", "std"),
+    )
+    summary = summary[summary["n"] >= min_n]
+
+    # t = mean(d) / (sd(d) / sqrt(n)); undefined when every difference is identical
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = summary["mean_d"] / (summary["std_d"] / np.sqrt(summary["n"]))
+    t = t.where(summary["std_d"] > 0)
+    summary["t_statistic"] = t
+    summary["p_value"] = 2 * stats.t.sf(np.abs(t), summary["n"] - 1)
+    summary["q_value"] = benjamini_hochberg(summary["p_value"])
+    summary.index.name = by
+    return summary
@@ -0,0 +1,194 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from movie_data import CACHE_DIR
+
+
+# --- OMDb endpoint (point OMDB_BASE_URL at a local stub server for tests) ---
+OMDB_BASE_URL = os.environ.get("OMDB_BASE_URL", "http://www.omdbapi.com/")
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_WORKERS = 8  # threads per fetch_many
+
+# --- Response cache: how long each field stays fresh (seconds) ---
+HOUR = 3600
+DAY = 24 * HOUR
+FIELD_TTL = {
+    "imdbRating": 6 * HOUR,
+    "imdbVotes": 6 * HOUR,
+    "Metascore": DAY,
+    "Ratings": DAY,
+    "BoxOffice": 7 * DAY,
+    "Awards": 7 * DAY,
+}
+DEFAULT_TTL = 90 * DAY  # Title, Plot, Genre, Director, Poster, Language, ...
+OMDB_CACHE_PATH = os.path.join(CACHE_DIR, "omdb.sqlite")
+
+
+# --- Token bucket shared by every worker thread (keeps us inside the API quota) ---
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# --- On-disk OMDb response store keyed by IMDb ID (survives restarts, shared by processes) ---
+class ResponseCache:
+    def __init__(self, path=OMDB_CACHE_PATH, field_ttl=FIELD_TTL, default_ttl=DEFAULT_TTL):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.field_ttl = field_ttl
+        self.default_ttl = default_ttl
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " imdb_id TEXT NOT NULL, plot TEXT NOT NULL, body TEXT NOT NULL,"
+                " etag TEXT, fetched_at REAL NOT NULL, PRIMARY KEY (imdb_id, plot))"
+            )
+            self.conn.commit()
+
+    def ttl(self, fields=()):
+        # A lookup is only as fresh as the most volatile field it needs
+        return min((self.field_ttl.get(f, self.default_ttl) for f in fields), default=self.default_ttl)
+
+    def get(self, imdb_id, plot="short"):
+        """Return (response, etag, age in seconds) or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, fetched_at FROM responses WHERE imdb_id = ? AND plot = ?",
+                (imdb_id, plot),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], time.time() - row[2]
+
+    def put(self, imdb_id, response, etag=None, plot="short"):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (imdb_id, plot, json.dumps(response), etag, time.time()),
+            )
+            self.conn.commit()
+
+    def touch(self, imdb_id, plot="short"):
+        # 304 Not Modified: the stored body is still current
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET fetched_at = ? WHERE imdb_id = ? AND plot = ?",
+                (time.time(), imdb_id, plot),
+            )
+            self.conn.commit()
+
+
+# --- Concurrent OMDb client: one keep-alive session, bounded workers, retry with backoff ---
+class OMDbClient:
+    def __init__(self, api_key, base_url=OMDB_BASE_URL, max_workers=MAX_WORKERS, rate=10.0, burst=None,
+                 timeout=(3.05, 10), retries=3, backoff=0.5, cache=None, pool_maxsize=None):
+        self.api_key = api_key
+        self.cache = cache
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.session = requests.Session()
+        # One keep-alive connection per thread that may be in flight: callers running several
+        # fetch_many at once (the sweep's shard workers) pass workers * max_workers
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize or max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, params, headers=None):
+        params = {**params, "apikey": self.api_key}
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                resp = self.session.get(self.base_url, params=params, headers=headers, timeout=self.timeout)
+                if resp.status_code not in RETRY_STATUS:
+                    resp.raise_for_status()
+                    return resp
+                error = requests.HTTPError(f"{resp.status_code} from OMDb", response=resp)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            # Exponential backoff with jitter so retrying workers do not fire together
+            time.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+    def get(self, **params):
+        """Return the decoded JSON for one request; raises after the last failed retry."""
+        return self._request(params).json()
+
+    def movie(self, imdb_id, fields=(), plot="short", max_age=None):
+        """Return the response for one IMDb ID, from the cache while the requested fields are fresh.
+
+        max_age (seconds) tightens the freshness limit; with it set, a failed request
+        raises instead of falling back to a stale copy (max_age=0: always ask OMDb).
+        """
+        params = {"i": imdb_id} if plot == "short" else {"i": imdb_id, "plot": plot}
+        if self.cache is None:
+            return self.get(**params)
+
+        cached = self.cache.get(imdb_id, plot)
+        ttl = self.cache.ttl(fields) if max_age is None else min(self.cache.ttl(fields), max_age)
+        if cached is not None and cached[2] < ttl:
+            return cached[0]
+
+        headers = {"If-None-Match": cached[1]} if cached and cached[1] else None
+        try:
+            resp = self._request(params, headers)
+        except requests.RequestException:
+            # OMDb unreachable or out of quota: a stale answer beats none, unless asked for a fresh one
+            if cached is None or max_age is not None:
+                raise
+            return cached[0]
+        if resp.status_code == 304:
+            self.cache.touch(imdb_id, plot)
+            return cached[0]
+        data = resp.json()
+        # Errors ("Request limit reached!", unknown IDs) are not stored
+        if data.get("Response") == "True":
+            self.cache.put(imdb_id, data, resp.headers.get("ETag"), plot)
+        return data
+
+    def fetch_many(self, imdb_ids, fields=(), plot="short", max_age=None):
+        """Yield (imdb_id, response or None) as each response arrives, not in input order."""
+        ids = list(dict.fromkeys(imdb_ids))
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(self.movie, imdb_id, fields, plot, max_age): imdb_id for imdb_id in ids}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except (requests.RequestException, ValueError):
+                    yield futures[future], None
+        finally:
+            # Stops queued requests if the caller abandons the generator early
+            executor.shutdown(wait=False, cancel_futures=True)